@@ -1,20 +1,172 @@
 # app.py
 
+import base64
+import cProfile
+import hashlib
 import heapq
+import os
+import pstats
+import random
+import threading
 import time
+import tracemalloc
 from flask import Flask, render_template, request, jsonify
-from collections import deque # Import deque for BFS queue
+from collections import deque, OrderedDict # deque for BFS queue, OrderedDict for the LRU cost grid cache
 
 app = Flask(__name__)
+# Per-request search profiling ("profiling": true on /solve) is off unless explicitly enabled.
+app.config['SOLVE_PROFILING_ENABLED'] = os.environ.get('SOLVE_PROFILING_ENABLED') == '1'
+# Directory to dump raw cProfile stats (.prof) into for offline flamegraphs; None disables dumping.
+app.config['SOLVE_PROFILE_DUMP_DIR'] = os.environ.get('SOLVE_PROFILE_DUMP_DIR')
 
 # --- Configuration ---
-TERRAIN_COSTS = { 
-    0: 1,            # Plain
-    1: float('inf'), # Wall
-    2: 5,            # Water
-    3: 10,           # Mud
-    4: 3             # Forest
+IMPASSABLE = float('inf')
+DIAGONAL_COST_FACTOR = 1.4 # Cost multiplier for diagonal moves (approx sqrt(2))
+
+# Named terrain cost profiles, one per unit type. Terrain types missing from a profile are impassable.
+DEFAULT_PROFILE = 'default'
+TERRAIN_PROFILES = {
+    'default': {
+        0: 1,            # Plain
+        1: IMPASSABLE,   # Wall
+        2: 5,            # Water
+        3: 10,           # Mud
+        4: 3             # Forest
+    },
+    'infantry': {
+        0: 1,            # Plain
+        1: IMPASSABLE,   # Wall
+        2: 8,            # Water (wading)
+        3: 4,            # Mud
+        4: 2             # Forest
+    },
+    'vehicle': {
+        0: 1,            # Plain
+        1: IMPASSABLE,   # Wall
+        2: IMPASSABLE,   # Water
+        3: 15,           # Mud
+        4: 6             # Forest
+    },
+    'boat': {
+        0: IMPASSABLE,   # Plain
+        1: IMPASSABLE,   # Wall
+        2: 1,            # Water
+        3: IMPASSABLE,   # Mud
+        4: IMPASSABLE    # Forest
+    }
 }
+BUILTIN_PROFILES = frozenset(TERRAIN_PROFILES) # Cannot be overwritten through /profiles
+MAX_REGISTERED_PROFILES = 32 # Max number of profiles registered through /profiles
+_profiles_lock = threading.Lock()
+
+COST_GRID_CACHE_SIZE = 32 # Max number of compiled (map, profile) cost grids kept in memory
+COST_GRID_CACHE_MAX_CELLS = 4_000_000 # Max total cells across all cached cost grids
+_cost_grid_cache = OrderedDict() # cache_key -> (cost_grid, cell_count)
+_cost_grid_cache_cells = 0
+_cost_grid_cache_lock = threading.Lock()
+
+MAZE_GENERATORS = ('prims', 'recursive_backtracker', 'rooms')
+MAZE_MIN_SIZE = 3 # Min rows/cols of a generated maze
+MAZE_MAX_CELLS = 1_000_000 # Max rows * cols of a generated maze
+MAZE_REGISTRY_SIZE = 64 # Max number of generated mazes kept server-side for solves by maze_id
+MAZE_TERRAIN_FEATURES = [
+    # Random-walk blobs per 50x25 board; counts are scaled to the board area
+    {'type': 2, 'count': 4, 'max_size': 50}, # Water
+    {'type': 3, 'count': 6, 'max_size': 30}, # Mud
+    {'type': 4, 'count': 5, 'max_size': 40}  # Forest
+]
+MAZE_TERRAIN_REFERENCE_AREA = 50 * 25
+_maze_registry = OrderedDict()
+_maze_registry_lock = threading.Lock()
+
+PROFILE_TOP_FUNCTIONS = 10 # Functions listed in a profiling summary, by self time
+PROFILE_TOP_ALLOCATIONS = 5 # Source lines listed in a profiling summary, by allocated blocks
+_profiling_lock = threading.Lock() # tracemalloc is process-wide, so profiled solves run one at a time
+
+# --- Terrain Cost Profiles ---
+
+def normalize_profile_costs(raw_costs):
+    """Validates a {terrain_type: cost} mapping (e.g. from JSON) and returns it with int keys and numeric costs.
+    A cost of None or "inf" marks the terrain as impassable."""
+    if not isinstance(raw_costs, dict) or not raw_costs:
+        raise ValueError('Profile costs must be a non-empty object mapping terrain types to costs.')
+    costs = {}
+    for terrain_type, cost in raw_costs.items():
+        try:
+            terrain_type = int(terrain_type)
+        except (TypeError, ValueError):
+            raise ValueError(f'Profile terrain type {terrain_type!r} is not an integer.')
+        if cost is None or cost == 'inf':
+            cost = IMPASSABLE
+        if isinstance(cost, bool) or not isinstance(cost, (int, float)) or not cost > 0:
+            raise ValueError(f'Profile cost for terrain type {terrain_type} must be a positive number, null or "inf".')
+        costs[terrain_type] = cost
+    return costs
+
+def resolve_profile(profile_spec):
+    """Returns (name, costs) for a profile given by name, or sent inline as {"name": ..., "costs": {...}}."""
+    if profile_spec is None:
+        return DEFAULT_PROFILE, TERRAIN_PROFILES[DEFAULT_PROFILE]
+    if isinstance(profile_spec, str):
+        if profile_spec not in TERRAIN_PROFILES:
+            raise ValueError(f'Unknown terrain profile: {profile_spec}.')
+        return profile_spec, TERRAIN_PROFILES[profile_spec]
+    if isinstance(profile_spec, dict):
+        name = profile_spec.get('name', 'custom')
+        if not isinstance(name, str):
+            raise ValueError('Profile name must be a string.')
+        return name, normalize_profile_costs(profile_spec.get('costs'))
+    raise ValueError('Profile must be a profile name or an object with "costs".')
+
+def min_step_cost(costs):
+    """Cheapest passable terrain cost in a profile. Used to scale heuristics so they stay admissible."""
+    finite_costs = [cost for cost in costs.values() if cost != IMPASSABLE]
+    return min(finite_costs) if finite_costs else 1
+
+def grid_digest(terrain_grid):
+    """Short, fixed-size cache key for an uploaded grid, so the cache does not hold a copy of every map."""
+    hasher = hashlib.sha1(f'{len(terrain_grid)}x{len(terrain_grid[0])}'.encode())
+    for row in terrain_grid:
+        hasher.update(repr(row).encode())
+    return hasher.hexdigest()
+
+def get_cost_grid(terrain_grid, costs, grid_key=None):
+    """Compiles a terrain grid into a grid of per-cell movement costs (IMPASSABLE for walls) for a profile.
+    Compiled grids are cached per (map, profile costs), so repeated solves on the same map skip the lookups.
+    grid_key identifies the map without hashing its cells, e.g. the id of a registered maze."""
+    global _cost_grid_cache_cells
+    # Keyed on the cost values rather than the profile name, so re-registering a name never serves stale costs.
+    if grid_key is None:
+        grid_key = grid_digest(terrain_grid)
+    cache_key = (grid_key, tuple(sorted(costs.items())))
+    with _cost_grid_cache_lock:
+        entry = _cost_grid_cache.get(cache_key)
+        if entry is not None:
+            _cost_grid_cache.move_to_end(cache_key)
+            return entry[0]
+
+    cost_grid = [[costs.get(cell, IMPASSABLE) for cell in row] for row in terrain_grid]
+    cell_count = len(terrain_grid) * len(terrain_grid[0])
+    with _cost_grid_cache_lock:
+        if cache_key not in _cost_grid_cache:
+            _cost_grid_cache[cache_key] = (cost_grid, cell_count)
+            _cost_grid_cache_cells += cell_count
+        # Evict least recently used grids past either limit, always keeping the one just compiled
+        while len(_cost_grid_cache) > 1 and (len(_cost_grid_cache) > COST_GRID_CACHE_SIZE or
+                                             _cost_grid_cache_cells > COST_GRID_CACHE_MAX_CELLS):
+            _, (_, evicted_cells) = _cost_grid_cache.popitem(last=False)
+            _cost_grid_cache_cells -= evicted_cells
+    return cost_grid
+
+def heuristic(position, target, allow_diagonal, scale=1):
+    """Manhattan distance, or octile distance when diagonal moves are allowed, scaled by the cheapest step cost."""
+    dx = abs(position[0] - target[0])
+    dy = abs(position[1] - target[1])
+    if allow_diagonal:
+        D = scale # Cost of cardinal movement
+        D2 = scale * DIAGONAL_COST_FACTOR # Cost of diagonal movement
+        return D * (dx + dy) + (D2 - 2 * D) * min(dx, dy) # Octile distance
+    return scale * (dx + dy) # Manhattan distance
 
 class Node:
     """A node class for all pathfinding algorithms"""
@@ -42,13 +194,13 @@ CARDINAL_NEIGHBORS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
 DIAGONAL_NEIGHBORS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
 ALL_NEIGHBORS = CARDINAL_NEIGHBORS + DIAGONAL_NEIGHBORS
 
-def astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
+def astar(cost_grid, start_pos, end_pos, allow_diagonal=False, heuristic_scale=1):
     """A* Search Algorithm"""
     start_node, end_node = Node(None, start_pos), Node(None, end_pos)
     open_list, closed_list = [], set()
     heapq.heappush(open_list, (start_node.f, start_node))
     visited_nodes_in_order = []
-    rows, cols = len(terrain_grid), len(terrain_grid[0])
+    rows, cols = len(cost_grid), len(cost_grid[0])
 
     while len(open_list) > 0:
         _, current_node = heapq.heappop(open_list)
@@ -76,10 +228,9 @@ def astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
             
             if not (0 <= node_position[0] < rows and 0 <= node_position[1] < cols): continue
             
-            terrain_type_at_neighbor = terrain_grid[node_position[0]][node_position[1]]
-            base_movement_cost = TERRAIN_COSTS.get(terrain_type_at_neighbor, float('inf'))
+            base_movement_cost = cost_grid[node_position[0]][node_position[1]]
 
-            if base_movement_cost == float('inf'): continue # Neighbor is a wall
+            if base_movement_cost == IMPASSABLE: continue # Neighbor is a wall
 
             actual_movement_cost = base_movement_cost
             is_diagonal_move = (dr != 0 and dc != 0)
@@ -88,14 +239,13 @@ def astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
                 # Corner cutting prevention
                 # Cell 1 for corner check: (current_r + dr, current_c)
                 # Cell 2 for corner check: (current_r, current_c + dc)
-                terrain_at_corner1 = terrain_grid[current_r + dr][current_c]
-                terrain_at_corner2 = terrain_grid[current_r][current_c + dc]
+                cost_at_corner1 = cost_grid[current_r + dr][current_c]
+                cost_at_corner2 = cost_grid[current_r][current_c + dc]
                 
-                if TERRAIN_COSTS.get(terrain_at_corner1, float('inf')) == float('inf') or \
-                   TERRAIN_COSTS.get(terrain_at_corner2, float('inf')) == float('inf'):
+                if cost_at_corner1 == IMPASSABLE or cost_at_corner2 == IMPASSABLE:
                     continue # Diagonal move blocked by a corner wall
                 
-                actual_movement_cost *= 1.4 # Apply diagonal factor
+                actual_movement_cost *= DIAGONAL_COST_FACTOR # Apply diagonal factor
             elif not is_diagonal_move:
                 # Cardinal move, cost is already base_movement_cost
                 pass
@@ -110,15 +260,7 @@ def astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
             child.g = current_node.g + actual_movement_cost
             
             # Heuristic calculation
-            dx = abs(child.position[0] - end_node.position[0])
-            dy = abs(child.position[1] - end_node.position[1])
-            if allow_diagonal:
-                D = 1  # Cost of cardinal movement
-                D2 = 1.4 # Cost of diagonal movement (approx sqrt(2))
-                child.h = D * (dx + dy) + (D2 - 2 * D) * min(dx, dy) # Octile distance
-                # This simplifies to: child.h = (dx + dy) - 0.6 * min(dx, dy)
-            else:
-                child.h = dx + dy # Manhattan distance
+            child.h = heuristic(child.position, end_node.position, allow_diagonal, heuristic_scale)
             
             child.f = child.g + child.h
 
@@ -127,24 +269,17 @@ def astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
 
     return visited_nodes_in_order, []
 
-def gbfs(terrain_grid, start_pos, end_pos, allow_diagonal=False):
+def gbfs(cost_grid, start_pos, end_pos, allow_diagonal=False, heuristic_scale=1):
     """Greedy Best-First Search Algorithm"""
     start_node, end_node = Node(None, start_pos), Node(None, end_pos)
     open_list, closed_list = [], set()
     # Priority for GBFS is h_score
     heapq.heappush(open_list, (start_node.h, start_node)) # Use h_score for priority
     visited_nodes_in_order = []
-    rows, cols = len(terrain_grid), len(terrain_grid[0])
+    rows, cols = len(cost_grid), len(cost_grid[0])
 
     # Calculate h for start_node
-    dx_start = abs(start_node.position[0] - end_node.position[0])
-    dy_start = abs(start_node.position[1] - end_node.position[1])
-    if allow_diagonal:
-        D = 1
-        D2 = 1.4
-        start_node.h = D * (dx_start + dy_start) + (D2 - 2 * D) * min(dx_start, dy_start)
-    else:
-        start_node.h = dx_start + dy_start
+    start_node.h = heuristic(start_node.position, end_node.position, allow_diagonal, heuristic_scale)
     start_node.f = start_node.h # f can be set to h for consistency or ignored
 
     while len(open_list) > 0:
@@ -172,21 +307,19 @@ def gbfs(terrain_grid, start_pos, end_pos, allow_diagonal=False):
             node_position = (current_r + dr, current_c + dc)
             if not (0 <= node_position[0] < rows and 0 <= node_position[1] < cols): continue
             
-            terrain_type_at_neighbor = terrain_grid[node_position[0]][node_position[1]]
-            base_movement_cost = TERRAIN_COSTS.get(terrain_type_at_neighbor, float('inf'))
+            base_movement_cost = cost_grid[node_position[0]][node_position[1]]
 
-            if base_movement_cost == float('inf'): continue # Neighbor is a wall
+            if base_movement_cost == IMPASSABLE: continue # Neighbor is a wall
             
             actual_movement_cost = base_movement_cost
             is_diagonal_move = (dr != 0 and dc != 0)
 
             if is_diagonal_move and allow_diagonal:
-                terrain_at_corner1 = terrain_grid[current_r + dr][current_c]
-                terrain_at_corner2 = terrain_grid[current_r][current_c + dc]
-                if TERRAIN_COSTS.get(terrain_at_corner1, float('inf')) == float('inf') or \
-                   TERRAIN_COSTS.get(terrain_at_corner2, float('inf')) == float('inf'):
+                cost_at_corner1 = cost_grid[current_r + dr][current_c]
+                cost_at_corner2 = cost_grid[current_r][current_c + dc]
+                if cost_at_corner1 == IMPASSABLE or cost_at_corner2 == IMPASSABLE:
                     continue
-                actual_movement_cost *= 1.4
+                actual_movement_cost *= DIAGONAL_COST_FACTOR
             elif not is_diagonal_move:
                 pass
             else: # is_diagonal_move is true but allow_diagonal is false
@@ -198,14 +331,7 @@ def gbfs(terrain_grid, start_pos, end_pos, allow_diagonal=False):
             child.g = current_node.g + actual_movement_cost # g is actual cost from start
             
             # Heuristic calculation for child
-            dx_child = abs(child.position[0] - end_node.position[0])
-            dy_child = abs(child.position[1] - end_node.position[1])
-            if allow_diagonal:
-                D = 1
-                D2 = 1.4
-                child.h = D * (dx_child + dy_child) + (D2 - 2 * D) * min(dx_child, dy_child)
-            else:
-                child.h = dx_child + dy_child
+            child.h = heuristic(child.position, end_node.position, allow_diagonal, heuristic_scale)
             
             child.f = child.h # For GBFS, f can be considered as h, or g+h if needed for display
 
@@ -263,9 +389,9 @@ def reconstruct_bi_path(node_fwd, node_bwd):
         
     return path_fwd + path_bwd
 
-def bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
+def bidirectional_astar(cost_grid, start_pos, end_pos, allow_diagonal=False, heuristic_scale=1):
     """Bidirectional A* Search Algorithm"""
-    rows, cols = len(terrain_grid), len(terrain_grid[0])
+    rows, cols = len(cost_grid), len(cost_grid[0])
 
     # Node initialization for forward search (from start to end)
     start_node_fwd = Node(None, start_pos)
@@ -287,24 +413,12 @@ def bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
     visited_nodes_in_order = [] # Stores visited nodes for visualization, with direction.
 
     # Heuristic calculation for forward search (start_node_fwd to end_pos)
-    dx_sf = abs(start_node_fwd.position[0] - end_node_fwd.position[0])
-    dy_sf = abs(start_node_fwd.position[1] - end_node_fwd.position[1])
-    if allow_diagonal:
-        D = 1; D2 = 1.4
-        start_node_fwd.h = D * (dx_sf + dy_sf) + (D2 - 2 * D) * min(dx_sf, dy_sf)
-    else:
-        start_node_fwd.h = dx_sf + dy_sf
+    start_node_fwd.h = heuristic(start_node_fwd.position, end_node_fwd.position, allow_diagonal, heuristic_scale)
     start_node_fwd.f = start_node_fwd.h 
     heapq.heappush(open_list_fwd, (start_node_fwd.f, start_node_fwd))
 
     # Heuristic calculation for backward search (start_node_bwd to start_pos)
-    dx_sb = abs(start_node_bwd.position[0] - end_node_bwd.position[0])
-    dy_sb = abs(start_node_bwd.position[1] - end_node_bwd.position[1])
-    if allow_diagonal:
-        D = 1; D2 = 1.4
-        start_node_bwd.h = D * (dx_sb + dy_sb) + (D2 - 2 * D) * min(dx_sb, dy_sb)
-    else:
-        start_node_bwd.h = dx_sb + dy_sb
+    start_node_bwd.h = heuristic(start_node_bwd.position, end_node_bwd.position, allow_diagonal, heuristic_scale)
     start_node_bwd.f = start_node_bwd.h
     heapq.heappush(open_list_bwd, (start_node_bwd.f, start_node_bwd))
 
@@ -356,20 +470,18 @@ def bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
                     
                     if not (0 <= node_position[0] < rows and 0 <= node_position[1] < cols): continue
                     
-                    terrain_type_at_neighbor = terrain_grid[node_position[0]][node_position[1]]
-                    base_movement_cost = TERRAIN_COSTS.get(terrain_type_at_neighbor, float('inf'))
-                    if base_movement_cost == float('inf'): continue
+                    base_movement_cost = cost_grid[node_position[0]][node_position[1]]
+                    if base_movement_cost == IMPASSABLE: continue
 
                     actual_movement_cost = base_movement_cost
                     is_diagonal_move = (dr != 0 and dc != 0)
 
                     if is_diagonal_move and allow_diagonal:
-                        terrain_at_corner1 = terrain_grid[current_r_fwd + dr][current_c_fwd]
-                        terrain_at_corner2 = terrain_grid[current_r_fwd][current_c_fwd + dc]
-                        if TERRAIN_COSTS.get(terrain_at_corner1, float('inf')) == float('inf') or \
-                           TERRAIN_COSTS.get(terrain_at_corner2, float('inf')) == float('inf'):
+                        cost_at_corner1 = cost_grid[current_r_fwd + dr][current_c_fwd]
+                        cost_at_corner2 = cost_grid[current_r_fwd][current_c_fwd + dc]
+                        if cost_at_corner1 == IMPASSABLE or cost_at_corner2 == IMPASSABLE:
                             continue
-                        actual_movement_cost *= 1.4
+                        actual_movement_cost *= DIAGONAL_COST_FACTOR
                     elif not is_diagonal_move:
                         pass
                     else: # is_diagonal_move true, allow_diagonal false
@@ -379,13 +491,7 @@ def bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
                     child_fwd.g = current_node_fwd.g + actual_movement_cost # Cost from start to child
                     
                     # Heuristic for forward search child (child_fwd to end_pos)
-                    dx_cf = abs(child_fwd.position[0] - end_node_fwd.position[0])
-                    dy_cf = abs(child_fwd.position[1] - end_node_fwd.position[1])
-                    if allow_diagonal:
-                        D = 1; D2 = 1.4
-                        child_fwd.h = D * (dx_cf + dy_cf) + (D2 - 2 * D) * min(dx_cf, dy_cf)
-                    else:
-                        child_fwd.h = dx_cf + dy_cf
+                    child_fwd.h = heuristic(child_fwd.position, end_node_fwd.position, allow_diagonal, heuristic_scale)
                     child_fwd.f = child_fwd.g + child_fwd.h
 
                     # If child is in closed_list_fwd and the existing node has a better or equal f-score, skip.
@@ -433,20 +539,18 @@ def bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
 
                     if not (0 <= node_position[0] < rows and 0 <= node_position[1] < cols): continue
                     
-                    terrain_type_at_neighbor = terrain_grid[node_position[0]][node_position[1]]
-                    base_movement_cost = TERRAIN_COSTS.get(terrain_type_at_neighbor, float('inf'))
-                    if base_movement_cost == float('inf'): continue
+                    base_movement_cost = cost_grid[node_position[0]][node_position[1]]
+                    if base_movement_cost == IMPASSABLE: continue
 
                     actual_movement_cost = base_movement_cost
                     is_diagonal_move = (dr != 0 and dc != 0)
 
                     if is_diagonal_move and allow_diagonal:
-                        terrain_at_corner1 = terrain_grid[current_r_bwd + dr][current_c_bwd]
-                        terrain_at_corner2 = terrain_grid[current_r_bwd][current_c_bwd + dc]
-                        if TERRAIN_COSTS.get(terrain_at_corner1, float('inf')) == float('inf') or \
-                           TERRAIN_COSTS.get(terrain_at_corner2, float('inf')) == float('inf'):
+                        cost_at_corner1 = cost_grid[current_r_bwd + dr][current_c_bwd]
+                        cost_at_corner2 = cost_grid[current_r_bwd][current_c_bwd + dc]
+                        if cost_at_corner1 == IMPASSABLE or cost_at_corner2 == IMPASSABLE:
                             continue
-                        actual_movement_cost *= 1.4
+                        actual_movement_cost *= DIAGONAL_COST_FACTOR
                     elif not is_diagonal_move:
                         pass
                     else: # is_diagonal_move true, allow_diagonal false
@@ -456,13 +560,7 @@ def bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
                     child_bwd.g = current_node_bwd.g + actual_movement_cost # Cost from end to child
                     
                     # Heuristic for backward search child (child_bwd to start_pos)
-                    dx_cb = abs(child_bwd.position[0] - end_node_bwd.position[0])
-                    dy_cb = abs(child_bwd.position[1] - end_node_bwd.position[1])
-                    if allow_diagonal:
-                        D = 1; D2 = 1.4
-                        child_bwd.h = D * (dx_cb + dy_cb) + (D2 - 2 * D) * min(dx_cb, dy_cb)
-                    else:
-                        child_bwd.h = dx_cb + dy_cb
+                    child_bwd.h = heuristic(child_bwd.position, end_node_bwd.position, allow_diagonal, heuristic_scale)
                     child_bwd.f = child_bwd.g + child_bwd.h
                     
                     # If child is in closed_list_bwd and the existing node has a better or equal f-score, skip.
@@ -494,13 +592,13 @@ def bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=False):
     return visited_nodes_in_order, [], float('inf') # No path found or one of the lists became empty before meeting
 
 
-def dijkstra(terrain_grid, start_pos, end_pos, allow_diagonal=False):
+def dijkstra(cost_grid, start_pos, end_pos, allow_diagonal=False):
     """Dijkstra's Algorithm: A* where heuristic is always 0."""
     start_node, end_node = Node(None, start_pos), Node(None, end_pos)
     open_list, closed_list = [], set()
     heapq.heappush(open_list, (start_node.f, start_node))
     visited_nodes_in_order = []
-    rows, cols = len(terrain_grid), len(terrain_grid[0])
+    rows, cols = len(cost_grid), len(cost_grid[0])
 
     while len(open_list) > 0:
         _, current_node = heapq.heappop(open_list)
@@ -526,21 +624,19 @@ def dijkstra(terrain_grid, start_pos, end_pos, allow_diagonal=False):
 
             if not (0 <= node_position[0] < rows and 0 <= node_position[1] < cols): continue
             
-            terrain_type_at_neighbor = terrain_grid[node_position[0]][node_position[1]]
-            base_movement_cost = TERRAIN_COSTS.get(terrain_type_at_neighbor, float('inf'))
+            base_movement_cost = cost_grid[node_position[0]][node_position[1]]
 
-            if base_movement_cost == float('inf'): continue # Neighbor is a wall
+            if base_movement_cost == IMPASSABLE: continue # Neighbor is a wall
 
             actual_movement_cost = base_movement_cost
             is_diagonal_move = (dr != 0 and dc != 0)
 
             if is_diagonal_move and allow_diagonal:
-                terrain_at_corner1 = terrain_grid[current_r + dr][current_c]
-                terrain_at_corner2 = terrain_grid[current_r][current_c + dc]
-                if TERRAIN_COSTS.get(terrain_at_corner1, float('inf')) == float('inf') or \
-                   TERRAIN_COSTS.get(terrain_at_corner2, float('inf')) == float('inf'):
+                cost_at_corner1 = cost_grid[current_r + dr][current_c]
+                cost_at_corner2 = cost_grid[current_r][current_c + dc]
+                if cost_at_corner1 == IMPASSABLE or cost_at_corner2 == IMPASSABLE:
                     continue
-                actual_movement_cost *= 1.4
+                actual_movement_cost *= DIAGONAL_COST_FACTOR
             elif not is_diagonal_move:
                 pass # Cost is already base_movement_cost
             else: # is_diagonal_move is true but allow_diagonal is false
@@ -558,12 +654,12 @@ def dijkstra(terrain_grid, start_pos, end_pos, allow_diagonal=False):
 
     return visited_nodes_in_order, []
 
-def bfs(terrain_grid, start_pos, end_pos, allow_diagonal=False):
+def bfs(cost_grid, start_pos, end_pos, allow_diagonal=False):
     """Breadth-First Search: Ignores costs, finds shortest path in steps."""
     start_node, end_node = Node(None, start_pos), Node(None, end_pos)
     open_list, closed_list = deque([start_node]), set([start_node.position])
     visited_nodes_in_order = []
-    rows, cols = len(terrain_grid), len(terrain_grid[0])
+    rows, cols = len(cost_grid), len(cost_grid[0])
 
     while len(open_list) > 0:
         current_node = open_list.popleft()
@@ -580,8 +676,7 @@ def bfs(terrain_grid, start_pos, end_pos, allow_diagonal=False):
             path_reconstruction_list = []
             while temp.parent is not None: # Iterate until temp is the child of the start node
                 path_reconstruction_list.append(temp.position)
-                terrain_type = terrain_grid[temp.position[0]][temp.position[1]]
-                total_cost += TERRAIN_COSTS.get(terrain_type, 1)
+                total_cost += cost_grid[temp.position[0]][temp.position[1]]
                 temp = temp.parent
             path_reconstruction_list.append(temp.position) # Add the start node position
             
@@ -600,18 +695,16 @@ def bfs(terrain_grid, start_pos, end_pos, allow_diagonal=False):
 
             if not (0 <= node_position[0] < rows and 0 <= node_position[1] < cols): continue
             
-            terrain_type_at_neighbor = terrain_grid[node_position[0]][node_position[1]]
             # Standard wall check for the target neighbor cell
-            if TERRAIN_COSTS.get(terrain_type_at_neighbor, float('inf')) == float('inf'): continue
+            if cost_grid[node_position[0]][node_position[1]] == IMPASSABLE: continue
 
             is_diagonal_move = (dr != 0 and dc != 0)
 
             if is_diagonal_move and allow_diagonal:
                 # Corner cutting prevention for BFS
-                terrain_at_corner1 = terrain_grid[current_r + dr][current_c]
-                terrain_at_corner2 = terrain_grid[current_r][current_c + dc]
-                if TERRAIN_COSTS.get(terrain_at_corner1, float('inf')) == float('inf') or \
-                   TERRAIN_COSTS.get(terrain_at_corner2, float('inf')) == float('inf'):
+                cost_at_corner1 = cost_grid[current_r + dr][current_c]
+                cost_at_corner2 = cost_grid[current_r][current_c + dc]
+                if cost_at_corner1 == IMPASSABLE or cost_at_corner2 == IMPASSABLE:
                     continue # Diagonal move blocked by a corner wall
             elif not is_diagonal_move:
                 # Cardinal move, no special checks needed beyond boundary and wall check already done
@@ -630,12 +723,408 @@ def bfs(terrain_grid, start_pos, end_pos, allow_diagonal=False):
             
     return visited_nodes_in_order, []
 
+def run_algorithm(algorithm, cost_grid, start_pos, end_pos, allow_diagonal=False, heuristic_scale=1):
+    """Runs the named algorithm (A* by default). Returns (visited_nodes, path, path_cost); path_cost is only
+    computed by Bidirectional A* and is None for the others."""
+    path_cost_val = None
+    if algorithm == 'dijkstra':
+        visited_nodes, path = dijkstra(cost_grid, start_pos, end_pos, allow_diagonal=allow_diagonal)
+    elif algorithm == 'bfs':
+        visited_nodes, path = bfs(cost_grid, start_pos, end_pos, allow_diagonal=allow_diagonal)
+    elif algorithm == 'gbfs':
+        visited_nodes, path = gbfs(cost_grid, start_pos, end_pos, allow_diagonal=allow_diagonal, heuristic_scale=heuristic_scale)
+    elif algorithm == 'bidirectional_astar':
+        visited_nodes, path, path_cost_val = bidirectional_astar(cost_grid, start_pos, end_pos, allow_diagonal=allow_diagonal, heuristic_scale=heuristic_scale)
+    else: # Default to astar
+        visited_nodes, path = astar(cost_grid, start_pos, end_pos, allow_diagonal=allow_diagonal, heuristic_scale=heuristic_scale)
+    return visited_nodes, path, path_cost_val
+
+# --- Search Profiling ---
+
+SEARCH_FUNCTIONS = {'astar', 'gbfs', 'bidirectional_astar', 'dijkstra', 'bfs'}
+
+def _profile_bucket(func):
+    """Maps a pstats function key (filename, lineno, name) to a hot-path category."""
+    filename, _, name = func
+    if 'heappush' in name or 'heappop' in name or name == '__lt__' or \
+       name in ("<method 'popleft' of 'collections.deque' objects>", "<method 'append' of 'collections.deque' objects>"):
+        return 'heap_ops' # Open list maintenance (deque for BFS); __lt__ is called by heap comparisons
+    if name == "<method 'append' of 'list' objects>" or name == 'reconstruct_bi_path':
+        return 'trace_building' # Visited node trace and path reconstruction
+    if name == '<built-in method builtins.any>' or (filename == __file__ and name == '<genexpr>'):
+        return 'open_list_scan' # The any(child == open_node ...) membership scan in A* and Dijkstra
+    if name in ('<built-in method builtins.abs>', '<built-in method builtins.min>'):
+        return 'neighbor_generation' # Heuristic arithmetic
+    if filename == __file__:
+        if name in SEARCH_FUNCTIONS:
+            return 'search_loop' # Self time of the search loop itself, including the inline neighbor checks
+        if name in ('__init__', 'heuristic'):
+            return 'neighbor_generation' # Child nodes and their heuristics
+    return 'other'
+
+def _profile_label(func):
+    filename, lineno, name = func
+    if filename == '~': # Built-in functions
+        return name
+    return f'{os.path.basename(filename)}:{lineno}({name})'
+
+def profile_search(search_args, dump_dir=None):
+    """Re-runs a search under cProfile, then under tracemalloc, and returns a compact JSON-able summary:
+    top functions by self time, time per hot-path category and allocation counts.
+    The two runs are separate so allocation tracing does not distort the timings.
+    Profiled runs are serialized; allocations by concurrent unprofiled requests can still show up in the counts."""
+    with _profiling_lock:
+        return _profile_search(search_args, dump_dir)
+
+def _profile_search(search_args, dump_dir):
+    profiler = cProfile.Profile()
+    profiler.runcall(run_algorithm, *search_args)
+    stats = pstats.Stats(profiler)
+
+    breakdown = dict.fromkeys(('heap_ops', 'open_list_scan', 'neighbor_generation', 'trace_building', 'search_loop', 'other'), 0.0)
+    functions = []
+    for func, (_, num_calls, self_time, cumulative_time, callers) in stats.stats.items():
+        if func[0] == __file__ and func[2] == '__eq__':
+            # Node equality serves the open-list scan, heap tie-breaks and the end-node check alike,
+            # so its time is charged to whichever category made each call.
+            for caller, (_, _, caller_time, _) in callers.items():
+                breakdown[_profile_bucket(caller)] += caller_time
+        else:
+            breakdown[_profile_bucket(func)] += self_time
+        functions.append((self_time, cumulative_time, num_calls, func))
+    functions.sort(key=lambda f: f[0], reverse=True)
+
+    summary = {
+        'total_ms': round(stats.total_tt * 1000, 2),
+        'top_functions': [
+            {'function': _profile_label(func), 'calls': num_calls,
+             'self_ms': round(self_time * 1000, 2), 'cumulative_ms': round(cumulative_time * 1000, 2)}
+            for self_time, cumulative_time, num_calls, func in functions[:PROFILE_TOP_FUNCTIONS]
+        ],
+        'breakdown_ms': {bucket: round(seconds * 1000, 2) for bucket, seconds in breakdown.items()}
+    }
+
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.take_snapshot()
+    result = run_algorithm(*search_args) # Kept alive so its allocations show up in the snapshot
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    if not already_tracing:
+        tracemalloc.stop()
+    del result
+
+    ignore_tracemalloc = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    allocation_diff = snapshot.filter_traces(ignore_tracemalloc).compare_to(baseline.filter_traces(ignore_tracemalloc), 'lineno')
+    allocation_diff.sort(key=lambda stat: stat.count_diff, reverse=True)
+    summary['allocations'] = {
+        'blocks': sum(stat.count_diff for stat in allocation_diff if stat.count_diff > 0),
+        'size_kb': round(sum(stat.size_diff for stat in allocation_diff if stat.size_diff > 0) / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'top_lines': [
+            {'line': f'{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+             'blocks': stat.count_diff, 'size_kb': round(stat.size_diff / 1024, 1)}
+            for stat in allocation_diff[:PROFILE_TOP_ALLOCATIONS] if stat.count_diff > 0
+        ]
+    }
+
+    if dump_dir:
+        # Named after the algorithm actually dispatched, never the raw client string
+        algorithm = search_args[0] if isinstance(search_args[0], str) and search_args[0] in SEARCH_FUNCTIONS else 'astar'
+        dump_dir = os.path.realpath(dump_dir)
+        dump_file = os.path.realpath(os.path.join(dump_dir, f'solve-{algorithm}-{int(time.time() * 1000)}.prof'))
+        if os.path.commonpath([dump_dir, dump_file]) == dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+            profiler.dump_stats(dump_file) # Loadable with pstats, snakeviz or flameprof
+            summary['dump_file'] = dump_file
+
+    return summary
+
+# --- Maze Generation ---
+# Mazes are built on a flat, row-major bytearray (one byte per cell, index = r * cols + c),
+# so bulk carving is done with slice assignment and the result is already in its wire encoding.
+
+WALL, PLAIN = 1, 0
+MAZE_STEPS = [(-2, 0), (2, 0), (0, -2), (0, 2)] # Moves between maze cells, which sit on even coordinates
+
+def _random_maze_cell(rows, cols, rng):
+    return rng.randrange((rows + 1) // 2) * 2, rng.randrange((cols + 1) // 2) * 2
+
+def _maze_step_neighbors(grid, rows, cols, r, c, cell_type):
+    """Maze cells two steps away from (r, c) that currently hold cell_type."""
+    return [(r + dr, c + dc) for dr, dc in MAZE_STEPS
+            if 0 <= r + dr < rows and 0 <= c + dc < cols and grid[(r + dr) * cols + c + dc] == cell_type]
+
+def carve_recursive_backtracker(grid, rows, cols, rng):
+    """Depth-first maze carving with an explicit stack: long, winding corridors."""
+    start_r, start_c = _random_maze_cell(rows, cols, rng)
+    grid[start_r * cols + start_c] = PLAIN
+    stack = [(start_r, start_c)]
+    while stack:
+        r, c = stack[-1]
+        candidates = _maze_step_neighbors(grid, rows, cols, r, c, WALL)
+        if not candidates:
+            stack.pop()
+            continue
+        nr, nc = rng.choice(candidates)
+        grid[((r + nr) // 2) * cols + (c + nc) // 2] = PLAIN # Wall between the two cells
+        grid[nr * cols + nc] = PLAIN
+        stack.append((nr, nc))
+
+def carve_prims(grid, rows, cols, rng):
+    """Randomized Prim's algorithm: many short dead ends branching off a random tree."""
+    start_r, start_c = _random_maze_cell(rows, cols, rng)
+    grid[start_r * cols + start_c] = PLAIN
+    frontier = _maze_step_neighbors(grid, rows, cols, start_r, start_c, WALL)
+    in_frontier = set(frontier)
+    while frontier:
+        # Swap a random frontier cell to the end so it can be popped in O(1)
+        rand_index = rng.randrange(len(frontier))
+        frontier[rand_index], frontier[-1] = frontier[-1], frontier[rand_index]
+        r, c = frontier.pop()
+        carved_neighbors = _maze_step_neighbors(grid, rows, cols, r, c, PLAIN)
+        if carved_neighbors:
+            nr, nc = rng.choice(carved_neighbors)
+            grid[r * cols + c] = PLAIN
+            grid[((r + nr) // 2) * cols + (c + nc) // 2] = PLAIN
+        for cell in _maze_step_neighbors(grid, rows, cols, r, c, WALL):
+            if cell not in in_frontier:
+                in_frontier.add(cell)
+                frontier.append(cell)
+
+def _carve_row_span(grid, cols, r, c1, c2):
+    lo, hi = min(c1, c2), max(c1, c2)
+    grid[r * cols + lo:r * cols + hi + 1] = bytes(hi - lo + 1)
+
+def _carve_col_span(grid, cols, c, r1, r2):
+    lo, hi = min(r1, r2), max(r1, r2)
+    grid[lo * cols + c:hi * cols + c + 1:cols] = bytes(hi - lo + 1)
+
+def carve_rooms(grid, rows, cols, rng):
+    """Rooms and corridors: non-overlapping rectangular rooms joined in sequence by L-shaped corridors."""
+    max_room_h, max_room_w = max(3, min(rows // 3, 10)), max(3, min(cols // 3, 14))
+    max_rooms = max(2, rows * cols // 150)
+    rooms = []
+    for _ in range(max_rooms * 5): # Placement attempts
+        h = min(rng.randint(3, max_room_h), rows)
+        w = min(rng.randint(3, max_room_w), cols)
+        r, c = rng.randint(0, rows - h), rng.randint(0, cols - w)
+        # Keep a one-cell wall margin between rooms: the room plus margin must still be solid wall
+        r0, r1, c0, c1 = max(r - 1, 0), min(r + h, rows - 1), max(c - 1, 0), min(c + w, cols - 1)
+        if any(grid[row * cols + c0:row * cols + c1 + 1].count(WALL) != c1 - c0 + 1 for row in range(r0, r1 + 1)):
+            continue
+        for row in range(r, r + h):
+            _carve_row_span(grid, cols, row, c, c + w - 1)
+        rooms.append((r, c, h, w))
+        if len(rooms) >= max_rooms:
+            break
+
+    centers = [(r + h // 2, c + w // 2) for r, c, h, w in rooms]
+    for (r1, c1), (r2, c2) in zip(centers, centers[1:]):
+        if rng.random() < 0.5:
+            _carve_row_span(grid, cols, r1, c1, c2)
+            _carve_col_span(grid, cols, c2, r1, r2)
+        else:
+            _carve_col_span(grid, cols, c1, r1, r2)
+            _carve_row_span(grid, cols, r2, c1, c2)
+
+MAZE_CARVERS = {
+    'prims': carve_prims,
+    'recursive_backtracker': carve_recursive_backtracker,
+    'rooms': carve_rooms
+}
+
+def make_maze_imperfect(grid, rows, cols, num_to_remove, rng):
+    """Knocks out walls separating two open cells to create loops. Returns the number of walls removed."""
+    candidate_walls = []
+    for r in range(1, rows - 1):
+        row_start = r * cols
+        for c in range(1, cols - 1):
+            i = row_start + c
+            if grid[i] != WALL: continue
+            if (grid[i - 1] == PLAIN and grid[i + 1] == PLAIN) or \
+               (grid[i - cols] == PLAIN and grid[i + cols] == PLAIN):
+                candidate_walls.append(i)
+    rng.shuffle(candidate_walls)
+    removed = candidate_walls[:num_to_remove]
+    for i in removed:
+        grid[i] = PLAIN
+    return len(removed)
+
+def add_terrain_features(grid, rows, cols, rng):
+    """Scatters water, mud and forest over open cells as random-walk blobs."""
+    open_cells = [i for i, cell in enumerate(grid) if cell == PLAIN]
+    if not open_cells:
+        return
+    scale = rows * cols / MAZE_TERRAIN_REFERENCE_AREA
+    for feature in MAZE_TERRAIN_FEATURES:
+        for _ in range(max(1, round(feature['count'] * scale))):
+            i = rng.choice(open_cells)
+            for _ in range(feature['max_size']):
+                if grid[i] != PLAIN: break
+                grid[i] = feature['type']
+                r, c = divmod(i, cols)
+                neighbors = [(r + dr) * cols + c + dc for dr, dc in CARDINAL_NEIGHBORS
+                             if 0 <= r + dr < rows and 0 <= c + dc < cols and grid[(r + dr) * cols + c + dc] == PLAIN]
+                if not neighbors: break
+                i = rng.choice(neighbors)
+
+def connect_to_maze(grid, rows, cols, r, c):
+    """Opens (r, c) and, if it is walled in, carves the shortest tunnel from it to the nearest open cell."""
+    start = r * cols + c
+    if grid[start] == PLAIN:
+        return
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        i = queue.popleft()
+        if grid[i] == PLAIN:
+            while i is not None: # Carve back along the search tree
+                grid[i] = PLAIN
+                i = parents[i]
+            return
+        cr, cc = divmod(i, cols)
+        for dr, dc in CARDINAL_NEIGHBORS:
+            nr, nc = cr + dr, cc + dc
+            j = nr * cols + nc
+            if 0 <= nr < rows and 0 <= nc < cols and j not in parents:
+                parents[j] = i
+                queue.append(j)
+    grid[start] = PLAIN # Nothing else is open
+
+def generate_maze(rows, cols, generator, seed, imperfection=0, keep_open=()):
+    """Generates a seeded maze with terrain as a flat bytearray. The same arguments always give the same maze.
+    keep_open lists (row, col) cells forced open and connected to the maze, e.g. the start and end nodes."""
+    rng = random.Random(seed)
+    grid = bytearray([WALL]) * (rows * cols)
+    MAZE_CARVERS[generator](grid, rows, cols, rng)
+    for r, c in keep_open:
+        connect_to_maze(grid, rows, cols, r, c)
+    if imperfection > 0:
+        make_maze_imperfect(grid, rows, cols, imperfection, rng)
+    add_terrain_features(grid, rows, cols, rng)
+    for r, c in keep_open:
+        grid[r * cols + c] = PLAIN
+    return grid
+
+def register_maze(maze_id, grid, rows, cols):
+    """Stores a generated maze so later solves can refer to it by maze_id instead of uploading the grid."""
+    maze = {
+        'rows': rows,
+        'cols': cols,
+        'grid': [bytes(grid[r * cols:(r + 1) * cols]) for r in range(rows)] # Rows of terrain type bytes
+    }
+    with _maze_registry_lock:
+        _maze_registry[maze_id] = maze
+        _maze_registry.move_to_end(maze_id)
+        if len(_maze_registry) > MAZE_REGISTRY_SIZE:
+            _maze_registry.popitem(last=False)
+
+def lookup_maze(maze_id):
+    """Returns a registered maze and marks it recently used, or None if it was never generated or was evicted."""
+    with _maze_registry_lock:
+        maze = _maze_registry.get(maze_id)
+        if maze is not None:
+            _maze_registry.move_to_end(maze_id)
+        return maze
+
+def encode_grid(grid):
+    """Compact wire encoding of a maze: one byte per cell, row-major, base64."""
+    return base64.b64encode(bytes(grid)).decode('ascii')
+
 # --- Flask Routes ---
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def profile_to_json(costs):
+    """JSON has no infinity, so impassable terrain is reported as null."""
+    return {str(terrain_type): (None if cost == IMPASSABLE else cost) for terrain_type, cost in costs.items()}
+
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    with _profiles_lock:
+        profiles = dict(TERRAIN_PROFILES) # Snapshot, so concurrent registrations cannot resize the dict mid-iteration
+    return jsonify({name: profile_to_json(costs) for name, costs in profiles.items()})
+
+@app.route('/profiles', methods=['POST'])
+def register_profile():
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Invalid input: No data provided.'}), 400
+
+    name = data.get('name')
+    if not isinstance(name, str) or not name:
+        return jsonify({'error': 'Invalid input: Profile name must be a non-empty string.'}), 400
+    try:
+        costs = normalize_profile_costs(data.get('costs'))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {e}'}), 400
+
+    if name in BUILTIN_PROFILES:
+        return jsonify({'error': f'Profile {name} is built in and cannot be overwritten.'}), 409
+
+    with _profiles_lock:
+        registered = len(TERRAIN_PROFILES) - len(BUILTIN_PROFILES)
+        if name not in TERRAIN_PROFILES and registered >= MAX_REGISTERED_PROFILES:
+            return jsonify({'error': f'Invalid input: Cannot register more than {MAX_REGISTERED_PROFILES} profiles.'}), 400
+        TERRAIN_PROFILES[name] = costs
+    return jsonify({name: profile_to_json(costs)}), 201
+
+@app.route('/maze', methods=['POST'])
+def create_maze():
+    data = request.get_json(silent=True) or {}
+
+    rows = data.get('rows', 25)
+    cols = data.get('cols', 50)
+    generator = data.get('generator', 'prims')
+    seed = data.get('seed')
+    imperfection = data.get('imperfection', 0)
+    keep_open = data.get('keep_open', [])
+
+    for name, value in (('rows', rows), ('cols', cols), ('imperfection', imperfection)):
+        if isinstance(value, bool) or not isinstance(value, int):
+            return jsonify({'error': f'Invalid input: {name} must be an integer.'}), 400
+    if rows < MAZE_MIN_SIZE or cols < MAZE_MIN_SIZE:
+        return jsonify({'error': f'Invalid input: Maze must be at least {MAZE_MIN_SIZE}x{MAZE_MIN_SIZE}.'}), 400
+    if rows * cols > MAZE_MAX_CELLS:
+        return jsonify({'error': f'Invalid input: Maze cannot have more than {MAZE_MAX_CELLS} cells.'}), 400
+    if imperfection < 0:
+        return jsonify({'error': 'Invalid input: imperfection cannot be negative.'}), 400
+    if generator not in MAZE_GENERATORS:
+        return jsonify({'error': f'Invalid input: Unknown generator: {generator}. Expected one of {", ".join(MAZE_GENERATORS)}.'}), 400
+
+    if seed is None:
+        seed = random.randrange(2 ** 32) # Returned to the client so the maze can be reproduced
+    elif isinstance(seed, bool) or not isinstance(seed, int):
+        return jsonify({'error': 'Invalid input: seed must be an integer.'}), 400
+
+    if not isinstance(keep_open, list) or not all(
+            isinstance(pos, list) and len(pos) == 2 and all(isinstance(coord, int) for coord in pos) for pos in keep_open):
+        return jsonify({'error': 'Invalid input: keep_open must be a list of [row, col] pairs.'}), 400
+    keep_open = [tuple(pos) for pos in keep_open]
+    if not all(0 <= r < rows and 0 <= c < cols for r, c in keep_open):
+        return jsonify({'error': 'Invalid input: keep_open coordinates out of bounds.'}), 400
+
+    grid = generate_maze(rows, cols, generator, seed, imperfection, keep_open)
+    # The id is derived from the generation parameters, so the same request always refers to the same maze.
+    maze_params = (generator, rows, cols, seed, imperfection, tuple(keep_open))
+    maze_id = hashlib.sha1(repr(maze_params).encode()).hexdigest()[:16]
+    register_maze(maze_id, grid, rows, cols)
+
+    return jsonify({
+        'maze_id': maze_id,
+        'seed': seed,
+        'generator': generator,
+        'rows': rows,
+        'cols': cols,
+        'encoding': 'u8-base64',
+        'grid': encode_grid(grid)
+    })
+
 @app.route('/solve', methods=['POST'])
 def solve_maze():
     data = request.get_json()
@@ -644,34 +1133,60 @@ def solve_maze():
     if not data:
         return jsonify({'error': 'Invalid input: No data provided.'}), 400
     
-    required_keys = ['grid', 'start', 'end']
+    required_keys = ['start', 'end']
     for key in required_keys:
         if key not in data:
             return jsonify({'error': f'Invalid input: Missing key: {key}.'}), 400
+    if 'grid' not in data and 'maze_id' not in data:
+        return jsonify({'error': 'Invalid input: Missing key: grid or maze_id.'}), 400
 
-    terrain_grid = data['grid']
+    maze_id = data.get('maze_id')
     start_pos_list = data['start']
     end_pos_list = data['end']
     algorithm = data.get('algorithm', 'astar') # Default to astar if not provided
     allow_diagonal = data.get('allow_diagonal', False) # Retrieve allow_diagonal preference
+    profiling = data.get('profiling', False) # Attach a hot-path breakdown of the search to the response
+
+    if not isinstance(algorithm, str):
+        return jsonify({'error': 'Invalid input: algorithm must be a string.'}), 400
+
+    if profiling and not app.config['SOLVE_PROFILING_ENABLED']:
+        return jsonify({'error': 'Profiling is disabled on this server. Set SOLVE_PROFILING_ENABLED=1 to enable it.'}), 403
+
+    try:
+        profile_name, profile_costs = resolve_profile(data.get('profile')) # Named or inline terrain cost profile
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {e}'}), 400
+
+    if maze_id is not None:
+        if not isinstance(maze_id, str):
+            return jsonify({'error': 'Invalid input: maze_id must be a string.'}), 400
+        # Maze generated and registered by /maze; already validated, so no grid upload is needed.
+        maze = lookup_maze(maze_id)
+        if maze is None:
+            # Distinct status and code so clients can fall back to uploading the grid without parsing the message
+            return jsonify({'error': f'Unknown or expired maze_id: {maze_id}. Generate it again via /maze.',
+                            'code': 'unknown_maze_id'}), 404
+        terrain_grid, rows, cols = maze['grid'], maze['rows'], maze['cols']
+    else:
+        terrain_grid = data['grid']
 
-    if not isinstance(terrain_grid, list) or not all(isinstance(row, list) for row in terrain_grid):
-        return jsonify({'error': 'Invalid input: Grid must be a list of lists.'}), 400
-    
-    if not terrain_grid or not terrain_grid[0]: # Check if grid is empty or rows are empty
-        return jsonify({'error': 'Invalid input: Grid cannot be empty.'}), 400
+        if not isinstance(terrain_grid, list) or not all(isinstance(row, list) for row in terrain_grid):
+            return jsonify({'error': 'Invalid input: Grid must be a list of lists.'}), 400
+        
+        if not terrain_grid or not terrain_grid[0]: # Check if grid is empty or rows are empty
+            return jsonify({'error': 'Invalid input: Grid cannot be empty.'}), 400
 
-    rows = len(terrain_grid)
-    cols = len(terrain_grid[0])
+        rows = len(terrain_grid)
+        cols = len(terrain_grid[0])
 
-    for r_idx, row in enumerate(terrain_grid):
-        if len(row) != cols:
-            return jsonify({'error': f'Invalid input: All grid rows must have the same length. Row {r_idx} has length {len(row)}, expected {cols}.'}), 400
-        for c_idx, cell in enumerate(row):
-            if not isinstance(cell, int) and not isinstance(cell, float): # Allow float for potential future use, though current TERRAIN_COSTS uses int keys
-                return jsonify({'error': f'Invalid input: Grid cells must be numbers. Cell at ({r_idx},{c_idx}) is not a number.'}), 400
-            # Further check if cell value is a valid key in TERRAIN_COSTS could be added if strict adherence to defined terrain types is required.
-            # For now, we assume unknown terrain types will default to a high cost or be handled by TERRAIN_COSTS.get()
+        for r_idx, row in enumerate(terrain_grid):
+            if len(row) != cols:
+                return jsonify({'error': f'Invalid input: All grid rows must have the same length. Row {r_idx} has length {len(row)}, expected {cols}.'}), 400
+            for c_idx, cell in enumerate(row):
+                if not isinstance(cell, int) and not isinstance(cell, float): # Allow float for potential future use, though profiles use int keys
+                    return jsonify({'error': f'Invalid input: Grid cells must be numbers. Cell at ({r_idx},{c_idx}) is not a number.'}), 400
+                # Terrain types unknown to the selected profile are treated as impassable when the cost grid is compiled.
 
     if not (isinstance(start_pos_list, list) or isinstance(start_pos_list, tuple)) or len(start_pos_list) != 2:
         return jsonify({'error': 'Invalid input: Start position must be a list or tuple of two integers.'}), 400
@@ -691,38 +1206,33 @@ def solve_maze():
     if not (0 <= end_pos[0] < rows and 0 <= end_pos[1] < cols):
         return jsonify({'error': 'Invalid input: End coordinates out of bounds.'}), 400
 
-    start_terrain_type = terrain_grid[start_pos[0]][start_pos[1]]
-    if TERRAIN_COSTS.get(start_terrain_type, float('inf')) == float('inf'):
-        return jsonify({'error': 'Invalid input: Start position is on a wall.'}), 400
+    cost_grid = get_cost_grid(terrain_grid, profile_costs, grid_key=maze_id)
+    heuristic_scale = min_step_cost(profile_costs)
+
+    if cost_grid[start_pos[0]][start_pos[1]] == IMPASSABLE:
+        return jsonify({'error': f'Invalid input: Start position is impassable for profile {profile_name}.'}), 400
     
-    end_terrain_type = terrain_grid[end_pos[0]][end_pos[1]]
-    if TERRAIN_COSTS.get(end_terrain_type, float('inf')) == float('inf'):
-        return jsonify({'error': 'Invalid input: End position is on a wall.'}), 400
+    if cost_grid[end_pos[0]][end_pos[1]] == IMPASSABLE:
+        return jsonify({'error': f'Invalid input: End position is impassable for profile {profile_name}.'}), 400
     
     # All validations passed, proceed with pathfinding
+    search_args = (algorithm, cost_grid, start_pos, end_pos, allow_diagonal, heuristic_scale)
     start_time = time.time()
-    path_cost_val = None # Initialize path_cost_val
-    
-    if algorithm == 'dijkstra':
-        visited_nodes, path = dijkstra(terrain_grid, start_pos, end_pos, allow_diagonal=allow_diagonal)
-    elif algorithm == 'bfs':
-        visited_nodes, path = bfs(terrain_grid, start_pos, end_pos, allow_diagonal=allow_diagonal)
-    elif algorithm == 'gbfs':
-        visited_nodes, path = gbfs(terrain_grid, start_pos, end_pos, allow_diagonal=allow_diagonal)
-    elif algorithm == 'bidirectional_astar':
-        visited_nodes, path, path_cost_val = bidirectional_astar(terrain_grid, start_pos, end_pos, allow_diagonal=allow_diagonal)
-    else: # Default to astar
-        visited_nodes, path = astar(terrain_grid, start_pos, end_pos, allow_diagonal=allow_diagonal)
-        
+    visited_nodes, path, path_cost_val = run_algorithm(*search_args)
     execution_time = (time.time() - start_time) * 1000
 
     response_data = {
         'visited_nodes': visited_nodes,
         'path': path,
-        'execution_time_ms': round(execution_time, 2)
+        'execution_time_ms': round(execution_time, 2),
+        'profile': profile_name
     }
     if algorithm == 'bidirectional_astar' and path: # Only add path_cost if path was found
         response_data['path_cost'] = path_cost_val
+
+    if profiling:
+        # Profiled separately so the results and execution time above are not skewed by instrumentation.
+        response_data['profiling'] = profile_search(search_args, dump_dir=app.config['SOLVE_PROFILE_DUMP_DIR'])
     
     return jsonify(response_data)
 
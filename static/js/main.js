@@ -1,11 +1,19 @@
+// Resolved while the script is executing; document.currentScript is null inside event handlers.
+const TRACE_WORKER_URL = new URL('trace_worker.js', document.currentScript.src);
+
 document.addEventListener('DOMContentLoaded', () => {
     // --- DOM Elements ---
     const algorithmSelect = document.getElementById('algorithm-select');
+    const profileSelect = document.getElementById('profile-select');
     const imperfectionSlider = document.getElementById('imperfection-slider');
-    const gridContainer = document.getElementById('grid-container');
+    const gridCanvas = document.getElementById('grid-canvas');
+    const gridContext = gridCanvas.getContext('2d');
+    const boardSizeSelect = document.getElementById('board-size-select');
     const startBtn = document.getElementById('start-btn');
     const resetBtn = document.getElementById('reset-btn');
     const mazeBtn = document.getElementById('maze-btn');
+    const generatorSelect = document.getElementById('generator-select');
+    const mazeSeedInput = document.getElementById('maze-seed-input');
     const speedSlider = document.getElementById('speed-slider');
     const storyLog = document.getElementById('story-log');
     const pathCostDisplay = document.getElementById('path-cost-display');
@@ -16,20 +24,61 @@ document.addEventListener('DOMContentLoaded', () => {
     // const stepBackwardBtn = document.getElementById('step-backward-btn');
 
     // --- Grid & State Configuration ---
-    const NUM_COLS = 50;
-    const NUM_ROWS = 25;
+    const MAX_CANVAS_WIDTH = 1250; // px; cells shrink to fit large boards on screen
+    const MAX_CELL_SIZE = 25;
+    const MIN_CELL_SIZE_FOR_BORDERS = 6;
+    const MIN_CELL_SIZE_FOR_ICONS = 12;
+    const MIN_CELL_SIZE_FOR_SCORES = 20;
+    const MAX_LOG_ENTRIES = 200; // Older story log entries are dropped so long animations stay cheap
+    const MAX_FRAME_ELAPSED_MS = 100; // Caps animation catch-up after a background tab or a slow frame
+    const CELL_UNVISITED = 0, CELL_CLOSED = 1, CELL_PATH = 2;
+    const EMPTY_TRACE = {
+        cells: new Int32Array(0), g: new Float64Array(0), h: new Float64Array(0), f: new Float64Array(0),
+        dirs: new Int8Array(0), path: new Int32Array(0), pathCost: "N/A", executionTimeMs: 0
+    };
+    let NUM_ROWS = 0;
+    let NUM_COLS = 0;
+    let cellSize = MAX_CELL_SIZE;
     let terrainGrid = [];
+    let cellStates = new Uint8Array(0); // CELL_* per cell index (row * NUM_COLS + col)
+    let cellVisits = new Int32Array(0); // Latest rendered trace index per cell, -1 if not visited yet
+    let currentMazeId = null; // Id of the server-registered maze in terrainGrid, null for the blank board
     let comparisonStats = []; // For comparison table
-    let startNode = { row: 12, col: 10 };
-    let endNode = { row: 12, col: 40 };
+    let startNode = { row: 0, col: 0 };
+    let endNode = { row: 0, col: 0 };
     let animationSpeed = 50;
     let isMouseDown = false, isDraggingStart = false, isDraggingEnd = false, isVisualizing = false;
     let isPaused = false;
     let currentStepIndex = 0;
-    let visitedNodesCache = [];
-    let pathCache = [];
+    let searchTrace = EMPTY_TRACE; // Decoded /solve result from the trace worker
+    let currentAlgorithm = 'astar'; // Algorithm of searchTrace, used when redrawing scores
     let currentPhase = 'search'; // 'search' or 'path'
 
+    const traceWorker = new Worker(TRACE_WORKER_URL);
+    let solveRequestId = 0;
+    const pendingSolves = new Map(); // requestId -> { resolve, reject } of solveInWorker promises
+
+    const rootStyle = getComputedStyle(document.documentElement);
+    const cssColor = (name) => rootStyle.getPropertyValue(name).trim();
+    const COLORS = {
+        terrain: {
+            0: cssColor('--plains-color'),
+            1: cssColor('--wall-color'),
+            2: cssColor('--water-color'),
+            3: cssColor('--mud-color'),
+            4: cssColor('--forest-color')
+        },
+        gridLine: cssColor('--primary-color'),
+        start: cssColor('--start-color'),
+        end: cssColor('--end-color'),
+        closed: cssColor('--path-visited-color'),
+        path: cssColor('--path-solution-color'),
+        pathOverlay: cssColor('--path-color-overlay'),
+        score: '#333',
+        fScore: cssColor('--text-color'),
+        pathScore: '#111'
+    };
+
     // --- Story Log Functions ---
     function clearLog() {
         storyLog.innerHTML = '';
@@ -37,7 +86,8 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function addToLog(message) {
-        storyLog.innerHTML += `<p>${message}</p>`;
+        storyLog.insertAdjacentHTML('beforeend', `<p>${message}</p>`);
+        while (storyLog.childElementCount > MAX_LOG_ENTRIES) storyLog.firstElementChild.remove();
         storyLog.scrollTop = storyLog.scrollHeight;
     }
 
@@ -48,7 +98,7 @@ document.addEventListener('DOMContentLoaded', () => {
         comparisonTableBody.innerHTML = ''; // Clear existing rows
         comparisonStats.forEach(stat => {
             const row = comparisonTableBody.insertRow();
-            row.insertCell().textContent = stat.algorithmName;
+            row.insertCell().textContent = stat.profile ? `${stat.algorithmName} (${stat.profile})` : stat.algorithmName;
             row.insertCell().textContent = stat.pathCost;
             row.insertCell().textContent = stat.pathLength;
             row.insertCell().textContent = stat.nodesExplored;
@@ -58,53 +108,101 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // --- Grid Initialization ---
+    function applyBoardSize() {
+        const [rows, cols] = boardSizeSelect.value.split('x').map(Number);
+        if (rows === NUM_ROWS && cols === NUM_COLS) return;
+        NUM_ROWS = rows;
+        NUM_COLS = cols;
+        startNode = { row: Math.floor(rows / 2), col: Math.floor(cols / 5) };
+        endNode = { row: Math.floor(rows / 2), col: Math.floor(cols * 4 / 5) };
+    }
+
     function createGrid() {
-        gridContainer.innerHTML = '';
+        applyBoardSize();
         terrainGrid = Array(NUM_ROWS).fill(null).map(() => Array(NUM_COLS).fill(0));
-        gridContainer.style.gridTemplateColumns = `repeat(${NUM_COLS}, 1fr)`;
-
-        for (let row = 0; row < NUM_ROWS; row++) {
-            for (let col = 0; col < NUM_COLS; col++) {
-                const cellElement = document.createElement('div');
-                cellElement.className = 'cell';
-                cellElement.dataset.row = row;
-                cellElement.dataset.col = col;
-                cellElement.addEventListener('mousedown', () => handleMouseDown(row, col));
-                cellElement.addEventListener('mouseover', () => handleMouseOver(row, col));
-                cellElement.addEventListener('mouseup', handleMouseUp);
-                gridContainer.appendChild(cellElement);
-            }
-        }
-        gridContainer.addEventListener('mouseleave', handleMouseUp);
+        cellSize = Math.max(1, Math.min(MAX_CELL_SIZE, Math.floor(MAX_CANVAS_WIDTH / NUM_COLS)));
+        gridCanvas.width = NUM_COLS * cellSize;
+        gridCanvas.height = NUM_ROWS * cellSize;
+        clearSearchState();
         updateNodeDisplay();
     }
 
+    function clearSearchState() {
+        cellStates = new Uint8Array(NUM_ROWS * NUM_COLS);
+        cellVisits = new Int32Array(NUM_ROWS * NUM_COLS).fill(-1);
+    }
+
     // --- UI Display ---
+    // The board is a single canvas; each cell is redrawn from terrainGrid, cellStates and cellVisits.
     function updateNodeDisplay() {
-        document.querySelectorAll('.cell').forEach(cell => {
-            const row = parseInt(cell.dataset.row);
-            const col = parseInt(cell.dataset.col);
-            cell.className = 'cell';
-            const terrainType = terrainGrid[row][col];
-            if (terrainType === 1) cell.classList.add('wall');
-            else if (terrainType === 2) cell.classList.add('water');
-            else if (terrainType === 3) cell.classList.add('mud');
-            else if (terrainType === 4) cell.classList.add('forest'); // Added Forest
-            else cell.classList.add('plains');
-
-            cell.innerHTML = `<span class="score g-score"></span><span class="score h-score"></span><span class="score f-score"></span>`;
-            if (row === startNode.row && col === startNode.col) {
-                cell.classList.add('start');
-                cell.innerHTML = '🚀';
-            }
-            if (row === endNode.row && col === endNode.col) {
-                cell.classList.add('end');
-                cell.innerHTML = '🏁';
+        gridContext.fillStyle = COLORS.gridLine;
+        gridContext.fillRect(0, 0, gridCanvas.width, gridCanvas.height);
+        for (let cell = 0; cell < NUM_ROWS * NUM_COLS; cell++) drawCell(cell);
+    }
+
+    function drawCell(cell) {
+        const row = Math.floor(cell / NUM_COLS);
+        const col = cell - row * NUM_COLS;
+        const border = cellSize >= MIN_CELL_SIZE_FOR_BORDERS ? 1 : 0;
+        const x = col * cellSize + border, y = row * cellSize + border, size = cellSize - border;
+        const terrainType = terrainGrid[row][col];
+        const state = cellStates[cell];
+        const isStartNode = (row === startNode.row && col === startNode.col);
+        const isEndNode = (row === endNode.row && col === endNode.col);
+        const showIcons = cellSize >= MIN_CELL_SIZE_FOR_ICONS;
+
+        if (!showIcons && (isStartNode || isEndNode)) {
+            gridContext.fillStyle = isStartNode ? COLORS.start : COLORS.end; // Too small for the icons
+        } else if (state === CELL_PATH) {
+            gridContext.fillStyle = terrainType === 0 ? COLORS.path : COLORS.terrain[terrainType];
+        } else if (state === CELL_CLOSED) {
+            gridContext.fillStyle = COLORS.closed;
+        } else {
+            gridContext.fillStyle = COLORS.terrain[terrainType] || COLORS.terrain[0];
+        }
+        gridContext.fillRect(x, y, size, size);
+        if (state === CELL_PATH && terrainType !== 0 && !(isStartNode || isEndNode)) {
+            gridContext.fillStyle = COLORS.pathOverlay; // Keeps the terrain visible under the path
+            gridContext.fillRect(x, y, size, size);
+        }
+
+        if (isStartNode || isEndNode) {
+            if (showIcons) {
+                gridContext.font = `${Math.floor(size * 0.7)}px sans-serif`;
+                gridContext.textAlign = 'center';
+                gridContext.textBaseline = 'middle';
+                gridContext.fillText(isStartNode ? '🚀' : '🏁', x + size / 2, y + size / 2);
             }
-        });
+        } else if (cellSize >= MIN_CELL_SIZE_FOR_SCORES && cellVisits[cell] !== -1) {
+            drawScores(cellVisits[cell], x, y, size, state === CELL_PATH);
+        }
+    }
+
+    function drawScores(visitIndex, x, y, size, onPath) {
+        gridContext.textBaseline = 'top';
+        gridContext.font = onPath ? 'bold 7px Roboto Mono, monospace' : '7px Roboto Mono, monospace';
+        gridContext.fillStyle = onPath ? COLORS.pathScore : COLORS.score;
+        gridContext.textAlign = 'left';
+        gridContext.fillText(searchTrace.g[visitIndex], x + 1, y + 1);
+        if (currentAlgorithm === 'bfs') return; // BFS only tracks steps
+        gridContext.textAlign = 'right';
+        gridContext.fillText(searchTrace.h[visitIndex].toFixed(0), x + size - 1, y + 1);
+        gridContext.font = 'bold 8px Roboto Mono, monospace';
+        gridContext.fillStyle = onPath ? COLORS.pathScore : COLORS.fScore;
+        gridContext.textAlign = 'center';
+        gridContext.textBaseline = 'bottom';
+        gridContext.fillText(searchTrace.f[visitIndex].toFixed(0), x + size / 2, y + size - 1);
     }
 
     // --- Event Handlers ---
+    function cellFromEvent(event) {
+        const rect = gridCanvas.getBoundingClientRect(); // The canvas may be scaled down by CSS
+        const row = Math.floor((event.clientY - rect.top) / rect.height * NUM_ROWS);
+        const col = Math.floor((event.clientX - rect.left) / rect.width * NUM_COLS);
+        if (row < 0 || row >= NUM_ROWS || col < 0 || col >= NUM_COLS) return null;
+        return { row, col };
+    }
+
     function handleMouseDown(row, col) {
         if (isVisualizing) return;
         isMouseDown = true;
@@ -113,14 +211,22 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function handleMouseOver(row, col) {
+        const isOverEndpoint = (row === startNode.row && col === startNode.col) || (row === endNode.row && col === endNode.col);
+        gridCanvas.style.cursor = isDraggingStart || isDraggingEnd ? 'grabbing' : (isOverEndpoint && !isVisualizing ? 'grab' : 'default');
         if (isVisualizing) return;
         if (isDraggingStart) {
             if (terrainGrid[row][col] !== 1 && !(row === endNode.row && col === endNode.col)) {
-                startNode = { row, col }; updateNodeDisplay();
+                const previous = startNode;
+                startNode = { row, col };
+                drawCell(previous.row * NUM_COLS + previous.col);
+                drawCell(row * NUM_COLS + col);
             }
         } else if (isDraggingEnd) {
             if (terrainGrid[row][col] !== 1 && !(row === startNode.row && col === startNode.col)) {
-                endNode = { row, col }; updateNodeDisplay();
+                const previous = endNode;
+                endNode = { row, col };
+                drawCell(previous.row * NUM_COLS + previous.col);
+                drawCell(row * NUM_COLS + col);
             }
         }
     }
@@ -130,7 +236,40 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // --- Core Visualization Logic ---
-    let fullVisualizationData = {}; // To store data for finalizeVisualization when stepping
+    // Runs /solve in the trace worker, which decodes the response into typed arrays off the main thread.
+    function solveInWorker(payload) {
+        return new Promise((resolve, reject) => {
+            const requestId = ++solveRequestId;
+            pendingSolves.set(requestId, { resolve, reject });
+            traceWorker.postMessage({ requestId, payload, rows: NUM_ROWS, cols: NUM_COLS });
+        });
+    }
+
+    traceWorker.addEventListener('message', (event) => {
+        const pending = pendingSolves.get(event.data.requestId);
+        if (!pending) return;
+        pendingSolves.delete(event.data.requestId);
+        if (event.data.error) {
+            const error = new Error(event.data.error);
+            error.status = event.data.status;
+            error.code = event.data.code;
+            pending.reject(error);
+        } else {
+            pending.resolve(event.data.trace);
+        }
+    });
+
+    // A worker that fails to load or throws outside its handler never answers, so settle everything in flight
+    // instead of leaving the controls disabled until a reload.
+    function rejectPendingSolves(message) {
+        for (const { reject } of pendingSolves.values()) reject(new Error(message));
+        pendingSolves.clear();
+    }
+    traceWorker.addEventListener('error', (event) => {
+        event.preventDefault();
+        rejectPendingSolves(`Trace worker failed: ${event.message || 'could not load trace_worker.js'}`);
+    });
+    traceWorker.addEventListener('messageerror', () => rejectPendingSolves('Trace worker sent a message that could not be read.'));
 
     async function visualize() {
         if (isVisualizing) return; // Already running or paused
@@ -138,27 +277,16 @@ document.addEventListener('DOMContentLoaded', () => {
         isVisualizing = true; // Master flag for ongoing visualization
         isPaused = false;
         currentStepIndex = 0;
-        visitedNodesCache = [];
-        pathCache = [];
+        searchTrace = EMPTY_TRACE;
         currentPhase = 'search';
-        fullVisualizationData = {}; // Reset
 
         clearLog();
         const selectedAlgorithm = algorithmSelect.value;
         const algoName = algorithmSelect.options[algorithmSelect.selectedIndex].text;
         addToLog(`▶️ Initializing ${algoName} for stepping or animation...`);
 
-        // Clear previous visual states
-        // It now safely clears previous animation states and scores.
-        document.querySelectorAll('.cell').forEach(c => {
-            c.classList.remove('open', 'closed', 'path');
-            const gScoreEl = c.querySelector('.g-score');
-            const hScoreEl = c.querySelector('.h-score');
-            const fScoreEl = c.querySelector('.f-score');
-            if (gScoreEl) gScoreEl.textContent = '';
-            if (hScoreEl) hScoreEl.textContent = '';
-            if (fScoreEl) fScoreEl.textContent = '';
-        });
+        // Clear previous visual states and scores
+        clearSearchState();
         updateNodeDisplay(); // Redraw start/end nodes and terrain
 
         toggleButtons(false); // Disables main buttons, enables step buttons via updateStepButtonStates if paused
@@ -167,25 +295,27 @@ document.addEventListener('DOMContentLoaded', () => {
         const allowDiagonal = diagonalToggle.checked;
 
         const payload = {
-            grid: terrainGrid,
             start: [startNode.row, startNode.col],
             end: [endNode.row, endNode.col],
             algorithm: selectedAlgorithm,
-            allow_diagonal: allowDiagonal // Added diagonal flag
+            allow_diagonal: allowDiagonal, // Added diagonal flag
+            profile: profileSelect.value // Terrain cost profile for the unit type
         };
+        if (currentMazeId) payload.maze_id = currentMazeId;
+        else payload.grid = terrainGrid;
 
         try {
-            const response = await fetch('/solve', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(payload) });
-            if (!response.ok) {
-                const errorData = await response.json();
-                throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
+            try {
+                searchTrace = await solveInWorker(payload); // Also stored for finalizeVisualization
+            } catch (error) {
+                // The server evicted the maze (or restarted); upload the decoded grid once instead
+                if (!payload.maze_id || error.code !== 'unknown_maze_id') throw error;
+                currentMazeId = null;
+                delete payload.maze_id;
+                payload.grid = terrainGrid;
+                searchTrace = await solveInWorker(payload);
             }
-            
-            const data = await response.json();
-            
-            visitedNodesCache = data.visited_nodes;
-            pathCache = data.path;
-            fullVisualizationData = data; // Store for finalizeVisualization
+            currentAlgorithm = selectedAlgorithm;
 
             isPaused = true; // Start in paused state
             currentStepIndex = 0;
@@ -208,47 +338,30 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    // dataForFinalize now directly uses fullVisualizationData
+    // The path cost is resolved by the trace worker with an indexed lookup of the end node's visit
     function finalizeVisualization(pathFoundSuccess, algoNameForFinalize, selectedAlgorithmForFinalize) {
-        const dataToUse = fullVisualizationData; // Use the stored full data
+        const trace = searchTrace;
+        const pathLength = trace.path.length;
+        const nodesExplored = trace.cells.length;
 
         let currentCost = "N/A";
         if (pathFoundSuccess) {
-            if (dataToUse.path_cost !== undefined) { // Changed dataForFinalize to dataToUse
-                currentCost = dataToUse.path_cost;    // Changed dataForFinalize to dataToUse
-            } else if (selectedAlgorithmForFinalize === 'bfs') {
-                const endNodeData = dataToUse.visited_nodes.find(n => n.pos[0] === endNode.row && n.pos[1] === endNode.col); // Changed dataForFinalize to dataToUse
-                if (endNodeData) {
-                    currentCost = endNodeData.g;
-                } else if (dataToUse.path.length > 0) { // Changed dataForFinalize to dataToUse
-                    const lastPathNodePos = dataToUse.path[dataToUse.path.length - 1]; // Changed dataForFinalize to dataToUse
-                    const lastPathNodeData = dataToUse.visited_nodes.find(n => n.pos[0] === lastPathNodePos[0] && n.pos[1] === lastPathNodePos[1]); // Changed dataForFinalize to dataToUse
-                    if (lastPathNodeData) currentCost = lastPathNodeData.g;
-                }
-            } else { // For A*, Dijkstra, GBFS
-                const finalPathNode = dataToUse.visited_nodes.find(n => n.pos[0] === endNode.row && n.pos[1] === endNode.col); // Changed dataForFinalize to dataToUse
-                if (finalPathNode) {
-                    currentCost = finalPathNode.g;
-                } else if (dataToUse.path.length > 0) { // Changed dataForFinalize to dataToUse
-                    const lastNodeInPath = dataToUse.path[dataToUse.path.length - 1]; // Changed dataForFinalize to dataToUse
-                    const lastNodeData = dataToUse.visited_nodes.find(n => n.pos[0] === lastNodeInPath[0] && n.pos[1] === lastNodeInPath[1]); // Changed dataForFinalize to dataToUse
-                    if (lastNodeData) currentCost = lastNodeData.g;
-                }
-            }
-            pathCostDisplay.textContent = `Result: Path Found! Cost: ${currentCost} | Length: ${dataToUse.path.length} steps | Explored: ${dataToUse.visited_nodes.length} nodes | Time: ${dataToUse.execution_time_ms}ms`; // Changed dataForFinalize to dataToUse
-            addToLog(`🏁 Path Found! Total cost: <span class="highlight">${currentCost}</span>, Steps: <span class="highlight">${dataToUse.path.length}</span>.`); // Changed dataForFinalize to dataToUse
-            addToLog(`📊 Stats: Explored <span class="highlight">${dataToUse.visited_nodes.length}</span> nodes in <span class="highlight">${dataToUse.execution_time_ms}ms</span>.`); // Changed dataForFinalize to dataToUse
+            currentCost = trace.pathCost;
+            pathCostDisplay.textContent = `Result: Path Found! Cost: ${currentCost} | Length: ${pathLength} steps | Explored: ${nodesExplored} nodes | Time: ${trace.executionTimeMs}ms`;
+            addToLog(`🏁 Path Found! Total cost: <span class="highlight">${currentCost}</span>, Steps: <span class="highlight">${pathLength}</span>.`);
+            addToLog(`📊 Stats: Explored <span class="highlight">${nodesExplored}</span> nodes in <span class="highlight">${trace.executionTimeMs}ms</span>.`);
         } else {
-            pathCostDisplay.textContent = `Result: No Path Found. Explored: ${dataToUse.visited_nodes.length} nodes | Time: ${dataToUse.execution_time_ms}ms`; // Changed dataForFinalize to dataToUse
-            addToLog(`❌ No path could be found. Explored <span class="highlight">${dataToUse.visited_nodes.length}</span> nodes in <span class="highlight">${dataToUse.execution_time_ms}ms</span>.`); // Changed dataForFinalize to dataToUse
+            pathCostDisplay.textContent = `Result: No Path Found. Explored: ${nodesExplored} nodes | Time: ${trace.executionTimeMs}ms`;
+            addToLog(`❌ No path could be found. Explored <span class="highlight">${nodesExplored}</span> nodes in <span class="highlight">${trace.executionTimeMs}ms</span>.`);
         }
 
         comparisonStats.push({
             algorithmName: algoNameForFinalize,
+            profile: trace.profile,
             pathCost: pathFoundSuccess ? currentCost : "N/A",
-            pathLength: pathFoundSuccess ? dataToUse.path.length : "N/A", // Changed dataForFinalize to dataToUse
-            nodesExplored: dataToUse.visited_nodes.length, // Changed dataForFinalize to dataToUse
-            executionTimeMs: dataToUse.execution_time_ms, // Changed dataForFinalize to dataToUse
+            pathLength: pathFoundSuccess ? pathLength : "N/A",
+            nodesExplored: nodesExplored,
+            executionTimeMs: trace.executionTimeMs,
             pathFound: pathFoundSuccess
         });
         renderComparisonTable();
@@ -270,16 +383,15 @@ document.addEventListener('DOMContentLoaded', () => {
         const algoName = algorithmSelect.options[algorithmSelect.selectedIndex].text;
 
         if (currentPhase === 'search') {
-            if (currentStepIndex < visitedNodesCache.length) {
-                const nodeData = visitedNodesCache[currentStepIndex];
-                renderNodeState(nodeData, selectedAlgorithm);
+            if (currentStepIndex < searchTrace.cells.length) {
+                renderNodeState(currentStepIndex, selectedAlgorithm);
                 currentStepIndex++;
-                if (currentStepIndex >= visitedNodesCache.length) {
+                if (currentStepIndex >= searchTrace.cells.length) {
                     currentPhase = 'path';
                     currentStepIndex = 0;
-                    if (pathCache.length === 0) {
+                    if (searchTrace.path.length === 0) {
                         isPaused = false;
-                        // Use fullVisualizationData which contains the original execution time
+                        // searchTrace contains the original execution time
                         finalizeVisualization(false, algoName, selectedAlgorithm);
                     } else {
                         addToLog("Search complete. Path found. Step through path or resume.");
@@ -287,16 +399,14 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             }
         } else if (currentPhase === 'path') {
-            if (currentStepIndex < pathCache.length) {
+            if (currentStepIndex < searchTrace.path.length) {
                 if (currentStepIndex === 0) {
                     addToLog("Tracing the optimal path back to the start...");
                 }
-                const pos = pathCache[currentStepIndex];
-                renderPathStep(pos);
+                renderPathStep(currentStepIndex);
                 currentStepIndex++;
-                if (currentStepIndex >= pathCache.length) {
+                if (currentStepIndex >= searchTrace.path.length) {
                     isPaused = false;
-                    // Use fullVisualizationData
                     finalizeVisualization(true, algoName, selectedAlgorithm);
                 }
             }
@@ -306,136 +416,97 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // --- Animation & Storytelling ---
 
-    // Renders a single node's state (extracted from animateSearch)
-    function renderNodeState(nodeData, algorithm) {
-        const [row, col] = nodeData.pos;
-        const cellElement = document.querySelector(`[data-row='${row}'][data-col='${col}']`);
-        if (!cellElement) return; // Should not happen
+    // Renders a single visited node from the trace; the story log entry is optional so animation can skip it
+    function renderNodeState(visitIndex, algorithm, log = true) {
+        const cell = searchTrace.cells[visitIndex];
+        const row = Math.floor(cell / NUM_COLS);
+        const col = cell - row * NUM_COLS;
 
         const isStartNode = (row === startNode.row && col === startNode.col);
         const isEndNode = (row === endNode.row && col === endNode.col);
 
         if (!isStartNode && !isEndNode) {
-            cellElement.classList.add('closed');
-            // Display G, H, and F scores
-            if (algorithm === 'astar' || algorithm === 'dijkstra' || algorithm === 'gbfs' || algorithm === 'bidirectional_astar') {
-                cellElement.querySelector('.g-score').textContent = nodeData.g;
-                cellElement.querySelector('.h-score').textContent = nodeData.h.toFixed(0);
-                cellElement.querySelector('.f-score').textContent = nodeData.f.toFixed(0);
-            } else { // BFS
-                cellElement.querySelector('.g-score').textContent = nodeData.g;
-            }
+            cellStates[cell] = CELL_CLOSED;
+            cellVisits[cell] = visitIndex; // G, H and F scores are drawn from this visit
+            drawCell(cell);
         }
+        if (log) addToLog(describeNodeState(visitIndex, row, col, algorithm));
+    }
 
-        let logMessage;
+    function describeNodeState(visitIndex, row, col, algorithm) {
+        const g = searchTrace.g[visitIndex];
+        const h = searchTrace.h[visitIndex].toFixed(0);
+        const f = searchTrace.f[visitIndex].toFixed(0);
         if (algorithm === 'bfs') {
-            logMessage = `Visiting [${row}, ${col}], steps: <span class="highlight">${nodeData.g}</span>.`;
+            return `Visiting [${row}, ${col}], steps: <span class="highlight">${g}</span>.`;
         } else if (algorithm === 'gbfs') {
-            logMessage = `Evaluating [${row}, ${col}] based on heuristic. H: <span class="highlight">${nodeData.h.toFixed(0)}</span>, G: <span class="highlight">${nodeData.g}</span>.`;
+            return `Evaluating [${row}, ${col}] based on heuristic. H: <span class="highlight">${h}</span>, G: <span class="highlight">${g}</span>.`;
         } else if (algorithm === 'bidirectional_astar') {
-            const direction = nodeData.dir === 'fwd' ? 'Fwd' : (nodeData.dir === 'bwd' ? 'Bwd' : 'Dir?');
-            logMessage = `Evaluating [${row}, ${col}] (Bi-A* ${direction}). G: <span class="highlight">${nodeData.g}</span>, H: <span class="highlight">${nodeData.h.toFixed(0)}</span>, F: <span class="highlight">${nodeData.f.toFixed(0)}</span>.`;
-        } else { // A* and Dijkstra
-            logMessage = `Evaluating [${row}, ${col}]. G: <span class="highlight">${nodeData.g}</span>, H: <span class="highlight">${nodeData.h.toFixed(0)}</span>, F: <span class="highlight">${nodeData.f.toFixed(0)}</span>.`;
+            const dir = searchTrace.dirs[visitIndex];
+            const direction = dir === 1 ? 'Fwd' : (dir === -1 ? 'Bwd' : 'Dir?');
+            return `Evaluating [${row}, ${col}] (Bi-A* ${direction}). G: <span class="highlight">${g}</span>, H: <span class="highlight">${h}</span>, F: <span class="highlight">${f}</span>.`;
         }
-        addToLog(logMessage);
+        // A* and Dijkstra
+        return `Evaluating [${row}, ${col}]. G: <span class="highlight">${g}</span>, H: <span class="highlight">${h}</span>, F: <span class="highlight">${f}</span>.`;
     }
 
-    // Renders a single path step (extracted from animatePath)
-    function renderPathStep(pos) {
-        const [row, col] = pos;
-        const cellElement = document.querySelector(`[data-row='${row}'][data-col='${col}']`);
-        if (!cellElement) return; // Should not happen
+    // Renders a single path step
+    function renderPathStep(pathIndex) {
+        const cell = searchTrace.path[pathIndex];
+        cellStates[cell] = CELL_PATH; // Replaces the closed state
+        drawCell(cell);
+    }
 
-        cellElement.classList.remove('closed'); // In case it was marked closed
-        cellElement.classList.add('path');
+    // Renders steps on requestAnimationFrame, as many per frame as the speed setting calls for, so large
+    // traces are not throttled to one step per timer tick. Resolves when the steps run out or on pause.
+    function animateSteps(totalSteps, getMsPerStep, renderStep) {
+        return new Promise(resolve => {
+            let lastFrameTime = performance.now();
+            let pendingMs = getMsPerStep(); // Render the first step on the first frame
+            function frame(now) {
+                if (isPaused || currentStepIndex >= totalSteps) {
+                    resolve();
+                    return;
+                }
+                // Clamped so a long gap between frames does not render the rest of the trace in one frame
+                pendingMs += Math.min(now - lastFrameTime, MAX_FRAME_ELAPSED_MS);
+                lastFrameTime = now;
+                const msPerStep = getMsPerStep();
+                const stepsThisFrame = Math.min(Math.floor(pendingMs / msPerStep), totalSteps - currentStepIndex);
+                pendingMs -= stepsThisFrame * msPerStep;
+                for (let i = 0; i < stepsThisFrame; i++) {
+                    renderStep(currentStepIndex, i === stepsThisFrame - 1);
+                    currentStepIndex++;
+                }
+                requestAnimationFrame(frame);
+            }
+            requestAnimationFrame(frame);
+        });
     }
 
-    async function animateSearch(visitedNodes, algorithm) {
-        // const terrainNames = { 0: "Plain", 1: "Wall", 2: "Water", 3: "Mud", 4: "Forest" }; // No longer needed here
-        while (currentStepIndex < visitedNodes.length && !isPaused) {
-            const nodeData = visitedNodes[currentStepIndex];
-            renderNodeState(nodeData, algorithm);
-            currentStepIndex++;
-            await new Promise(resolve => setTimeout(resolve, animationSpeed / 5));
-        }
-        // If loop finishes (not paused), it means search animation is complete.
-        // Transition to path or finalize is handled by resumeBtn logic or handleStep.
+    // Transition to path or finalize after the animation is handled by resumeBtn logic or handleStep.
+    function animateSearch(algorithm) {
+        // Only the last node of each frame is logged; logging every node would flood the story log
+        return animateSteps(searchTrace.cells.length, () => animationSpeed / 5,
+            (visitIndex, isLastInFrame) => renderNodeState(visitIndex, algorithm, isLastInFrame));
     }
 
-    async function animatePath(path) {
-        // addToLog("Tracing the optimal path back to the start..."); // Moved to where animatePath is called
-        while (currentStepIndex < path.length && !isPaused) {
-            const pos = path[currentStepIndex];
-            renderPathStep(pos);
-            currentStepIndex++;
-            await new Promise(resolve => setTimeout(resolve, animationSpeed));
-        }
-        // If loop finishes (not paused), path animation is complete.
-        // Finalization is handled by resumeBtn logic or handleStep.
+    function animatePath() {
+        return animateSteps(searchTrace.path.length, () => animationSpeed, renderPathStep);
     }
 
     // --- Maze and Terrain Generation ---
-    function getNeighbors(row, col, distance) {
-        const neighbors = [];
-        if (row - distance >= 0) neighbors.push({ row: row - distance, col });
-        if (row + distance < NUM_ROWS) neighbors.push({ row: row + distance, col });
-        if (col - distance >= 0) neighbors.push({ row, col: col - distance });
-        if (col + distance < NUM_COLS) neighbors.push({ row, col: col + distance });
-        return neighbors;
-    }
-    
-    function makeMazeImperfect(numToRemove) {
-        const candidateWalls = [];
-        for (let r = 1; r < NUM_ROWS - 1; r++) {
-            for (let c = 1; c < NUM_COLS - 1; c++) {
-                if (terrainGrid[r][c] === 1) {
-                    if (terrainGrid[r][c - 1] === 0 && terrainGrid[r][c + 1] === 0) candidateWalls.push({ row: r, col: c });
-                    else if (terrainGrid[r - 1][c] === 0 && terrainGrid[r + 1][c] === 0) candidateWalls.push({ row: r, col: c });
-                }
-            }
-        }
-        for (let i = candidateWalls.length - 1; i > 0; i--) {
-            const j = Math.floor(Math.random() * (i + 1));
-            [candidateWalls[i], candidateWalls[j]] = [candidateWalls[j], candidateWalls[i]];
-        }
-        let removedCount = 0;
-        for (let i = 0; i < numToRemove && i < candidateWalls.length; i++) {
-            const wall = candidateWalls[i];
-            terrainGrid[wall.row][wall.col] = 0;
-            removedCount++;
-        }
-        addToLog(`Carved <span class="highlight">${removedCount}</span> extra paths to create loops.`);
-    }
-
-    function addTerrainFeatures() {
-        const terrainConfig = [
-            { type: 2, count: 4, maxSize: 50 }, // Water
-            { type: 3, count: 6, maxSize: 30 }, // Mud
-            { type: 4, count: 5, maxSize: 40 }  // Forest (new)
-        ];
-        for (const feature of terrainConfig) {
-            for (let i = 0; i < feature.count; i++) {
-                let startRow, startCol;
-                do {
-                    startRow = Math.floor(Math.random() * NUM_ROWS);
-                    startCol = Math.floor(Math.random() * NUM_COLS);
-                } while (terrainGrid[startRow][startCol] !== 0);
-                let currentRow = startRow, currentCol = startCol;
-                for (let j = 0; j < feature.maxSize; j++) {
-                    if (terrainGrid[currentRow][currentCol] !== 0) break;
-                    terrainGrid[currentRow][currentCol] = feature.type;
-                    const neighbors = getNeighbors(currentRow, currentCol, 1).filter(n => terrainGrid[n.row][n.col] === 0);
-                    if (neighbors.length === 0) break;
-                    const nextCell = neighbors[Math.floor(Math.random() * neighbors.length)];
-                    currentRow = nextCell.row;
-                    currentCol = nextCell.col;
-                }
-            }
+    // Decodes the server's compact maze encoding (one byte per cell, row-major, base64) into terrainGrid rows.
+    function decodeGrid(encoded, rows, cols) {
+        const bytes = Uint8Array.from(atob(encoded), ch => ch.charCodeAt(0));
+        const grid = [];
+        for (let r = 0; r < rows; r++) {
+            grid.push(Array.from(bytes.subarray(r * cols, (r + 1) * cols)));
         }
+        return grid;
     }
 
-    function generateMazeWithTerrains() {
+    async function generateMazeWithTerrains() {
         if (isVisualizing) return;
         // Clear comparison stats when generating a new maze
         comparisonStats = [];
@@ -444,39 +515,51 @@ document.addEventListener('DOMContentLoaded', () => {
         resetBoard(); // resetBoard also clears log and calls addToLog
         // clearLog(); // Already called by resetBoard
         addToLog("Generating a new, imperfect maze..."); // This will be after resetBoard's message
-        for (let r = 0; r < NUM_ROWS; r++) {
-            for (let c = 0; c < NUM_COLS; c++) {
-                terrainGrid[r][c] = 1;
-            }
+
+        const seedValue = mazeSeedInput.value.trim();
+        const payload = {
+            rows: NUM_ROWS,
+            cols: NUM_COLS,
+            generator: generatorSelect.value,
+            imperfection: parseInt(imperfectionSlider.value),
+            keep_open: [[startNode.row, startNode.col], [endNode.row, endNode.col]]
+        };
+        if (seedValue !== '') payload.seed = parseInt(seedValue);
+
+        try {
+            mazeBtn.disabled = true;
+            const response = await fetch('/maze', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(payload) });
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.error || `HTTP error! status: ${response.status}`);
+
+            terrainGrid = decodeGrid(data.grid, data.rows, data.cols);
+            currentMazeId = data.maze_id; // Solves refer to the maze by id instead of uploading the grid
+            updateNodeDisplay();
+            addToLog(`Maze generated with seed <span class="highlight">${data.seed}</span>! You can now visualize the path.`);
+        } catch (error) {
+            console.error("Error during maze generation:", error);
+            addToLog(`🛑 An error occurred: ${error.message}`);
+        } finally {
+            toggleButtons(true);
         }
-        const startR = Math.floor(Math.random() * (NUM_ROWS / 2)) * 2;
-        const startC = Math.floor(Math.random() * (NUM_COLS / 2)) * 2;
-        terrainGrid[startR][startC] = 0;
-        const frontier = getNeighbors(startR, startC, 2);
-        while (frontier.length > 0) {
-            const randIndex = Math.floor(Math.random() * frontier.length);
-            const { row, col } = frontier.splice(randIndex, 1)[0];
-            const neighbors = getNeighbors(row, col, 2).filter(n => terrainGrid[n.row][n.col] === 0);
-            if (neighbors.length > 0) {
-                const neighbor = neighbors[Math.floor(Math.random() * neighbors.length)];
-                const inBetweenRow = (row + neighbor.row) / 2;
-                const inBetweenCol = (col + neighbor.col) / 2;
-                terrainGrid[row][col] = 0;
-                terrainGrid[inBetweenRow][inBetweenCol] = 0;
-            }
-            getNeighbors(row, col, 2).forEach(f => {
-                if (terrainGrid[f.row][f.col] === 1 && !frontier.some(cell => cell.row === f.row && cell.col === f.col)) {
-                    frontier.push(f);
-                }
-            });
+    }
+
+    // Fills the profile select from the server, so profiles registered through POST /profiles can be picked.
+    // The built-in options in the template stay in place if the request fails.
+    async function loadProfiles() {
+        try {
+            const response = await fetch('/profiles');
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.error || `HTTP error! status: ${response.status}`);
+
+            const selected = profileSelect.value;
+            profileSelect.replaceChildren(...Object.keys(data).map(name => {
+                const label = name.charAt(0).toUpperCase() + name.slice(1);
+                return new Option(label, name, false, name === selected);
+            }));
+        } catch (error) {
+            console.error("Error loading unit profiles:", error);
         }
-        const numExtraPaths = parseInt(imperfectionSlider.value);
-        if (numExtraPaths > 0) makeMazeImperfect(numExtraPaths);
-        addTerrainFeatures();
-        terrainGrid[startNode.row][startNode.col] = 0;
-        terrainGrid[endNode.row][endNode.col] = 0;
-        updateNodeDisplay();
-        addToLog("Maze generated! You can now visualize the path.");
     }
 
     // --- Control Functions ---
@@ -484,10 +567,9 @@ document.addEventListener('DOMContentLoaded', () => {
         isVisualizing = false;
         isPaused = false; // Reset pause state
         currentStepIndex = 0;
-        visitedNodesCache = [];
-        pathCache = [];
+        searchTrace = EMPTY_TRACE;
         currentPhase = 'search';
-        fullVisualizationData = {};
+        currentMazeId = null;
 
         createGrid(); // This also calls updateNodeDisplay
         clearLog();
@@ -503,6 +585,9 @@ document.addEventListener('DOMContentLoaded', () => {
         mazeBtn.disabled = isVisualizing || !enabled;
         resetBtn.disabled = isVisualizing || !enabled;
         algorithmSelect.disabled = isVisualizing || !enabled;
+        if (profileSelect) profileSelect.disabled = isVisualizing || !enabled;
+        if (generatorSelect) generatorSelect.disabled = isVisualizing || !enabled;
+        if (boardSizeSelect) boardSizeSelect.disabled = isVisualizing || !enabled;
 
         // Step buttons are handled by updateStepButtonStates
         updateStepButtonStates();
@@ -512,8 +597,8 @@ document.addEventListener('DOMContentLoaded', () => {
         if (!stepForwardBtn || !resumeBtn) return; // Buttons might not exist in all test environments
 
         const canStepForward = isPaused &&
-                               ( (currentPhase === 'search' && currentStepIndex < visitedNodesCache.length) ||
-                                 (currentPhase === 'path' && currentStepIndex < pathCache.length) );
+                               ( (currentPhase === 'search' && currentStepIndex < searchTrace.cells.length) ||
+                                 (currentPhase === 'path' && currentStepIndex < searchTrace.path.length) );
 
         stepForwardBtn.disabled = !canStepForward;
         resumeBtn.disabled = !isPaused;
@@ -524,11 +609,15 @@ document.addEventListener('DOMContentLoaded', () => {
         mazeBtn.disabled = isVisualizing;
         resetBtn.disabled = isVisualizing;
         algorithmSelect.disabled = isVisualizing;
+        if (profileSelect) profileSelect.disabled = isVisualizing;
+        if (generatorSelect) generatorSelect.disabled = isVisualizing;
+        if (boardSizeSelect) boardSizeSelect.disabled = isVisualizing;
     }
 
     // --- Initial Setup ---
     createGrid();
     renderComparisonTable(); // Initial render of the (empty) comparison table
+    if (profileSelect) loadProfiles();
     addToLog("Welcome! Select an algorithm and click 'Generate Maze'.");
 
     // const clearComparisonBtn = document.getElementById('clear-comparison-btn'); // Cached
@@ -540,6 +629,23 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    gridCanvas.addEventListener('mousedown', (e) => {
+        const cell = cellFromEvent(e);
+        if (cell) handleMouseDown(cell.row, cell.col);
+    });
+    gridCanvas.addEventListener('mousemove', (e) => {
+        const cell = cellFromEvent(e);
+        if (cell) handleMouseOver(cell.row, cell.col);
+    });
+    gridCanvas.addEventListener('mouseup', handleMouseUp);
+    gridCanvas.addEventListener('mouseleave', handleMouseUp);
+
+    if (boardSizeSelect) {
+        boardSizeSelect.addEventListener('change', () => {
+            if (!isVisualizing) resetBoard();
+        });
+    }
+
     startBtn.addEventListener('click', visualize);
     resetBtn.addEventListener('click', resetBoard);
     mazeBtn.addEventListener('click', generateMazeWithTerrains);
@@ -562,17 +668,17 @@ document.addEventListener('DOMContentLoaded', () => {
 
             if (currentPhase === 'search') {
                 addToLog("▶️ Resuming search animation...");
-                await animateSearch(visitedNodesCache, selectedAlgorithm);
+                await animateSearch(selectedAlgorithm);
 
                 // After animateSearch completes (or is interrupted by pause)
                 if (!isPaused) { // If not paused again during animation
-                    if (currentStepIndex >= visitedNodesCache.length) { // Search fully completed
+                    if (currentStepIndex >= searchTrace.cells.length) { // Search fully completed
                         currentPhase = 'path';
                         currentStepIndex = 0;
-                        if (pathCache.length > 0) {
+                        if (searchTrace.path.length > 0) {
                             addToLog("▶️ Resuming path animation...");
-                            await animatePath(pathCache);
-                            if (!isPaused && currentStepIndex >= pathCache.length) { // Path fully completed
+                            await animatePath();
+                            if (!isPaused && currentStepIndex >= searchTrace.path.length) { // Path fully completed
                                 finalizeVisualization(true, algoName, selectedAlgorithm);
                             } else if (isPaused) {
                                 // Was paused during path animation
@@ -590,8 +696,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             } else if (currentPhase === 'path') {
                 addToLog("▶️ Resuming path animation...");
-                await animatePath(pathCache);
-                if (!isPaused && currentStepIndex >= pathCache.length) { // Path fully completed
+                await animatePath();
+                if (!isPaused && currentStepIndex >= searchTrace.path.length) { // Path fully completed
                     finalizeVisualization(true, algoName, selectedAlgorithm);
                 } else if (isPaused) {
                     // Was paused during path animation
@@ -0,0 +1,64 @@
+// Web Worker that runs /solve requests and decodes the search trace off the main thread.
+// Visited nodes and the path are flattened into typed arrays of cell indices (row * cols + col),
+// so the canvas renderer and result finalization can index cells directly instead of searching.
+
+self.onmessage = async (event) => {
+    const { requestId, payload, rows, cols } = event.data;
+    try {
+        const response = await fetch('/solve', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(payload) });
+        const data = await response.json();
+        if (!response.ok) {
+            const error = new Error(data.error || `HTTP error! status: ${response.status}`);
+            error.status = response.status;
+            error.code = data.code; // Machine-readable reason, e.g. 'unknown_maze_id'
+            throw error;
+        }
+
+        const trace = decodeTrace(data, rows, cols, payload.end);
+        const transfer = [trace.cells.buffer, trace.g.buffer, trace.h.buffer, trace.f.buffer, trace.dirs.buffer, trace.path.buffer];
+        self.postMessage({ requestId, trace }, transfer);
+    } catch (error) {
+        self.postMessage({ requestId, error: error.message, status: error.status, code: error.code });
+    }
+};
+
+function decodeTrace(data, rows, cols, endPos) {
+    const visitedNodes = data.visited_nodes;
+    const count = visitedNodes.length;
+    const cells = new Int32Array(count);
+    const g = new Float64Array(count);
+    const h = new Float64Array(count);
+    const f = new Float64Array(count);
+    const dirs = new Int8Array(count); // 1 = forward, -1 = backward (Bidirectional A*), 0 = single direction
+    const firstVisit = new Int32Array(rows * cols).fill(-1); // Index of the first visit of each cell
+
+    for (let i = 0; i < count; i++) {
+        const node = visitedNodes[i];
+        const cell = node.pos[0] * cols + node.pos[1];
+        cells[i] = cell;
+        g[i] = node.g;
+        h[i] = node.h;
+        f[i] = node.f;
+        dirs[i] = node.dir === 'fwd' ? 1 : (node.dir === 'bwd' ? -1 : 0);
+        if (firstVisit[cell] === -1) firstVisit[cell] = i;
+    }
+
+    const path = Int32Array.from(data.path, pos => pos[0] * cols + pos[1]);
+
+    return {
+        cells, g, h, f, dirs, path,
+        pathCost: finalPathCost(data, g, firstVisit, path, endPos[0] * cols + endPos[1]),
+        executionTimeMs: data.execution_time_ms,
+        profile: data.profile,
+        profiling: data.profiling
+    };
+}
+
+function finalPathCost(data, g, firstVisit, path, endCell) {
+    if (path.length === 0) return "N/A";
+    if (data.path_cost !== undefined) return data.path_cost; // Bidirectional A* reports its own cost
+    // Otherwise the cost is the g-score recorded when the end node (or, failing that, the last path node) was visited
+    let visitIndex = firstVisit[endCell];
+    if (visitIndex === -1) visitIndex = firstVisit[path[path.length - 1]];
+    return visitIndex === -1 ? "N/A" : g[visitIndex];
+}